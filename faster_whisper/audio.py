@@ -10,7 +10,7 @@ import gc
 import io
 import itertools
 
-from typing import BinaryIO, Union
+from typing import BinaryIO, Iterator, Union
 
 import av
 import numpy as np
@@ -76,6 +76,41 @@ def decode_audio(
     return audio
 
 
+def decode_audio_blocks(
+    input_file: Union[str, BinaryIO],
+    sampling_rate: int = 16000,
+) -> Iterator[np.ndarray]:
+    """Decodes the audio incrementally.
+
+    Args:
+      input_file: Path to the input file or a file-like object.
+      sampling_rate: Resample the audio to this sample rate.
+
+    Returns:
+      A generator over consecutive float32 Numpy arrays of the mono audio, so that the
+      decoded audio does not need to fit in memory.
+    """
+    resampler = av.audio.resampler.AudioResampler(
+        format="s16",
+        layout="mono",
+        rate=sampling_rate,
+    )
+
+    try:
+        with av.open(input_file, mode="r", metadata_errors="ignore") as container:
+            frames = container.decode(audio=0)
+            frames = _ignore_invalid_frames(frames)
+            frames = _group_frames(frames, 500000)
+            frames = _resample_frames(frames, resampler)
+
+            for frame in frames:
+                yield frame.to_ndarray().reshape(-1).astype(np.float32) / 32768.0
+    finally:
+        # See decode_audio.
+        del resampler
+        gc.collect()
+
+
 def _ignore_invalid_frames(frames):
     iterator = iter(frames)
 
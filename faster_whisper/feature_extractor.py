@@ -1,3 +1,5 @@
+from typing import Iterable
+
 import numpy as np
 
 
@@ -195,14 +197,22 @@ class FeatureExtractor:
 
         return output if return_complex else np.real(output)
 
-    def __call__(self, waveform: np.ndarray, padding=160, chunk_length=None):
+    def set_chunk_length(self, chunk_length: int) -> None:
+        self.n_samples = chunk_length * self.sampling_rate
+        self.nb_max_frames = self.n_samples // self.hop_length
+
+    def __call__(
+        self, waveform: np.ndarray, padding=160, chunk_length=None, normalize=True
+    ):
         """
         Compute the log-Mel spectrogram of the provided audio.
+
+        When `normalize` is False, the log10 of the Mel spectrogram is returned without
+        the dynamic range compression and the scaling of `normalize_log_spec`.
         """
 
         if chunk_length is not None:
-            self.n_samples = chunk_length * self.sampling_rate
-            self.nb_max_frames = self.n_samples // self.hop_length
+            self.set_chunk_length(chunk_length)
 
         if waveform.dtype is not np.float32:
             waveform = waveform.astype(np.float32)
@@ -224,7 +234,93 @@ class FeatureExtractor:
         mel_spec = self.mel_filters @ magnitudes
 
         log_spec = np.log10(np.clip(mel_spec, a_min=1e-10, a_max=None))
-        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
-        log_spec = (log_spec + 4.0) / 4.0
+        if normalize:
+            log_spec = self.normalize_log_spec(log_spec)
 
         return log_spec
+
+    @staticmethod
+    def normalize_log_spec(log_spec: np.ndarray) -> np.ndarray:
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+
+class StreamingFeatures:
+    """Log-Mel spectrogram of an audio stream, computed over a sliding buffer.
+
+    It replaces the array returned by `FeatureExtractor` for long audio: the frames are
+    computed when they are sliced, and the audio more than `history_frames` before the
+    latest slice is released. The slices must be requested in increasing order, apart
+    from the last `history_frames`. Each slice is normalized on its own, like the features
+    of the chunks in the batched pipeline.
+    """
+
+    def __init__(
+        self,
+        feature_extractor: FeatureExtractor,
+        audio_blocks: Iterable[np.ndarray],
+        num_samples: int,
+        history_frames: int,
+        padding: int = 160,
+    ):
+        self.feature_extractor = feature_extractor
+        self.audio_blocks = iter(audio_blocks)
+        self.history_frames = history_frames
+        self.num_samples = num_samples + padding
+        hop_length = feature_extractor.hop_length
+        self.shape = (
+            feature_extractor.mel_filters.shape[0],
+            self.num_samples // hop_length,
+        )
+        # Samples on each side of a slice, so that the STFT windows of its frames do not
+        # depend on the reflection padding of the sliced audio.
+        self.context_samples = (
+            -(-feature_extractor.n_fft // 2 // hop_length) * hop_length
+        )
+        self.buffer = np.zeros(0, dtype=np.float32)
+        self.buffer_start = 0
+        self.released_frames = 0
+
+    def __getitem__(self, key) -> np.ndarray:
+        _, frames = key
+        start, stop, _ = frames.indices(self.shape[-1])
+        if stop <= start:
+            return np.zeros((self.shape[0], 0), dtype=np.float32)
+
+        hop_length = self.feature_extractor.hop_length
+        first_sample = max(start * hop_length - self.context_samples, 0)
+        last_sample = min(stop * hop_length + self.context_samples, self.num_samples)
+        if first_sample < self.buffer_start:
+            raise RuntimeError(
+                "The audio before frame %d was already released" % self.released_frames
+            )
+
+        self.released_frames = max(self.released_frames, start - self.history_frames)
+        release_sample = self.released_frames * hop_length - self.context_samples
+
+        while self.buffer_start + self.buffer.shape[0] < last_sample:
+            block = next(self.audio_blocks, None)
+            if block is None:
+                # Pads the end of the stream like FeatureExtractor.
+                block = np.zeros(
+                    self.num_samples - self.buffer_start - self.buffer.shape[0],
+                    dtype=np.float32,
+                )
+            self.buffer = np.concatenate([self.buffer, block])
+            if release_sample > self.buffer_start:
+                released_samples = min(
+                    release_sample - self.buffer_start, self.buffer.shape[0]
+                )
+                self.buffer = self.buffer[released_samples:]
+                self.buffer_start += released_samples
+
+        offset = first_sample // hop_length
+        log_spec = self.feature_extractor(
+            self.buffer[
+                first_sample - self.buffer_start : last_sample - self.buffer_start
+            ],
+            padding=0,
+            normalize=False,
+        )[:, start - offset : stop - offset]
+
+        return self.feature_extractor.normalize_log_spec(log_spec)
@@ -0,0 +1,267 @@
+import os
+import queue
+import threading
+import time
+
+from concurrent.futures import Future, wait
+from dataclasses import dataclass
+from typing import BinaryIO, List, Optional, Set, Tuple, Union
+
+import numpy as np
+
+from faster_whisper.transcribe import Segment, TranscriptionInfo, WhisperModel
+from faster_whisper.utils import get_logger
+
+
+@dataclass
+class PoolStats:
+    num_replicas: int
+    queue_depth: int
+    busy_replicas: int
+    completed_requests: int
+    failed_requests: int
+    utilization: float
+    replica_utilization: List[float]
+
+
+class WhisperPool:
+    """Pool of model replicas transcribing the queued requests on CPU.
+
+    Each replica is loaded and run by its own thread, pinned to a disjoint set of CPU cores
+    when the platform supports it. The threads of the model inherit the affinity of the
+    thread loading it. The requests are queued and dispatched in arrival order to the
+    first idle replica.
+    """
+
+    def __init__(
+        self,
+        model_size_or_path: str,
+        num_replicas: Optional[int] = None,
+        cpu_sets: Optional[List[Set[int]]] = None,
+        max_queue_size: int = 0,
+        **model_kwargs,
+    ):
+        """Loads the replicas of the model.
+
+        Args:
+          model_size_or_path: Size, path or model ID of the model, as in WhisperModel.
+          num_replicas: Number of replicas. If not set, the number of CPU sets or 1.
+          cpu_sets: Disjoint sets of CPU cores, one per replica. If not set, the cores
+            available to the process are split evenly between the replicas. Each replica
+            uses one thread per core of its set.
+          max_queue_size: Maximum number of queued requests. If the queue is full,
+            `submit` blocks until a request is dispatched. 0 means no limit.
+          model_kwargs: Other arguments of WhisperModel, except `device`, `cpu_threads`
+            and `num_workers`.
+        """
+        self.logger = get_logger()
+
+        if cpu_sets is None:
+            num_replicas = num_replicas or 1
+            cpu_sets = split_cpu_sets(get_available_cpus(), num_replicas)
+        else:
+            cpu_sets = [set(cpu_set) for cpu_set in cpu_sets]
+            num_replicas = num_replicas or len(cpu_sets)
+            if num_replicas != len(cpu_sets):
+                raise ValueError(
+                    "Expected %d CPU sets, got %d" % (num_replicas, len(cpu_sets))
+                )
+            if len(set().union(*cpu_sets)) != sum(map(len, cpu_sets)):
+                raise ValueError("The CPU sets should be disjoint")
+
+        if not hasattr(os, "sched_setaffinity"):
+            self.logger.warning(
+                "The replicas are not pinned to their CPU sets on this platform"
+            )
+
+        self.cpu_sets = cpu_sets
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        # Separate lock to queue the requests and the stop signals in order: a request
+        # can wait for a free slot while the replicas update their stats.
+        self._submit_lock = threading.Lock()
+        self._closed = False
+        self._start_time = time.monotonic()
+        self._busy_since = [None] * num_replicas
+        self._busy_time = [0.0] * num_replicas
+        self._completed_requests = 0
+        self._failed_requests = 0
+
+        self._loaded = [Future() for _ in range(num_replicas)]
+        self._threads = [
+            threading.Thread(
+                target=self._run_replica,
+                args=(replica_idx, model_size_or_path, model_kwargs, loaded_future),
+                daemon=True,
+            )
+            for replica_idx, loaded_future in enumerate(self._loaded)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+        # Wait for all replicas so that the stop signals are only sent to the loaded ones.
+        wait(self._loaded)
+        try:
+            for loaded_future in self._loaded:
+                loaded_future.result()
+        except Exception:
+            self.close()
+            raise
+
+    def submit(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        **kwargs,
+    ) -> Future:
+        """Queues a transcription request.
+
+        Arguments:
+          audio: Path to the input file (or a file-like object), or the audio waveform.
+          kwargs: Arguments of `WhisperModel.transcribe`.
+
+        Returns:
+          A future of a tuple with the list of transcribed segments and the instance of
+          TranscriptionInfo. Cancelling the future removes the request if it was not
+          dispatched yet.
+        """
+        future = Future()
+        with self._submit_lock:
+            if self._closed:
+                raise RuntimeError("The pool is closed")
+            self._queue.put((future, audio, kwargs))
+        return future
+
+    def transcribe(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        **kwargs,
+    ) -> Tuple[List[Segment], TranscriptionInfo]:
+        """Transcribes the audio on the first idle replica and waits for the result.
+
+        See `submit` for the arguments.
+        """
+        return self.submit(audio, **kwargs).result()
+
+    @property
+    def queue_depth(self) -> int:
+        """Number of requests waiting for a replica."""
+        return self._queue.qsize()
+
+    def get_stats(self) -> PoolStats:
+        """Returns the queue depth and the utilization of the replicas since the pool was
+        created."""
+        with self._lock:
+            now = time.monotonic()
+            elapsed = max(now - self._start_time, 1e-9)
+            replica_utilization = [
+                (busy_time + (now - busy_since if busy_since is not None else 0))
+                / elapsed
+                for busy_time, busy_since in zip(self._busy_time, self._busy_since)
+            ]
+            return PoolStats(
+                num_replicas=len(self._threads),
+                queue_depth=self.queue_depth,
+                busy_replicas=sum(
+                    busy_since is not None for busy_since in self._busy_since
+                ),
+                completed_requests=self._completed_requests,
+                failed_requests=self._failed_requests,
+                utilization=sum(replica_utilization) / len(replica_utilization),
+                replica_utilization=replica_utilization,
+            )
+
+    def close(self, wait: bool = True) -> None:
+        """Stops the replicas after the queued requests are processed."""
+        with self._submit_lock:
+            if not self._closed:
+                self._closed = True
+                # The replicas which failed to load are already stopped.
+                for loaded_future in self._loaded:
+                    if loaded_future.exception() is None:
+                        self._queue.put(None)
+
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run_replica(
+        self,
+        replica_idx: int,
+        model_size_or_path: str,
+        model_kwargs: dict,
+        loaded_future: Future,
+    ) -> None:
+        cpu_set = self.cpu_sets[replica_idx]
+
+        try:
+            if hasattr(os, "sched_setaffinity"):
+                # Pin the current thread: the threads created by the model inherit it.
+                os.sched_setaffinity(0, cpu_set)
+            model = WhisperModel(
+                model_size_or_path,
+                device="cpu",
+                cpu_threads=len(cpu_set),
+                num_workers=1,
+                **model_kwargs,
+            )
+        except Exception as e:
+            loaded_future.set_exception(e)
+            return
+
+        loaded_future.set_result(None)
+
+        while True:
+            request = self._queue.get()
+            if request is None:
+                break
+
+            future, audio, kwargs = request
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            with self._lock:
+                self._busy_since[replica_idx] = time.monotonic()
+
+            try:
+                segments, info = model.transcribe(audio, **kwargs)
+                result = (list(segments), info)
+            except Exception as e:
+                future.set_exception(e)
+                failed = True
+            else:
+                future.set_result(result)
+                failed = False
+
+            with self._lock:
+                self._busy_time[replica_idx] += (
+                    time.monotonic() - self._busy_since[replica_idx]
+                )
+                self._busy_since[replica_idx] = None
+                if failed:
+                    self._failed_requests += 1
+                else:
+                    self._completed_requests += 1
+
+
+def get_available_cpus() -> List[int]:
+    """Returns the CPU cores available to the process."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def split_cpu_sets(cpus: List[int], num_sets: int) -> List[Set[int]]:
+    """Splits the CPU cores into contiguous sets of similar sizes."""
+    if num_sets > len(cpus):
+        raise ValueError(
+            "Cannot split %d CPU cores into %d sets" % (len(cpus), num_sets)
+        )
+
+    bounds = [set_idx * len(cpus) // num_sets for set_idx in range(num_sets + 1)]
+    return [set(cpus[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
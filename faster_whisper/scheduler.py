@@ -0,0 +1,334 @@
+import heapq
+import itertools
+import threading
+import time
+
+from concurrent.futures import Future
+from dataclasses import dataclass, replace
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import ctranslate2
+import numpy as np
+
+from faster_whisper.tokenizer import Tokenizer
+from faster_whisper.transcribe import (
+    BatchedInferencePipeline,
+    TranscriptionCallback,
+    TranscriptionInfo,
+    TranscriptionOptions,
+    WhisperModel,
+    get_decoding_key,
+)
+
+
+@dataclass
+class PriorityWaitStats:
+    num_waits: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.num_waits if self.num_waits else 0.0
+
+
+class PriorityScheduler:
+    """Shares a model between the transcriptions of several priority classes.
+
+    The transcriptions created with the scheduler take turns on the model: a turn covers
+    one window of the sequential pipeline or one batch of the batched pipeline, and the
+    turn is released before the segments are yielded. At each window or batch boundary,
+    the waiting transcriptions of the highest priority class get the next turn, and the
+    transcriptions of the same class alternate in their arrival order. Interactive requests
+    therefore preempt a long bulk transcription after at most one window or batch.
+    """
+
+    def __init__(
+        self,
+        priorities: Iterable[str] = ("interactive", "bulk"),
+        max_active: int = 1,
+    ):
+        """Initializes the scheduler.
+
+        Args:
+          priorities: Names of the priority classes, from the highest to the lowest.
+          max_active: Number of turns running concurrently, for example the number of
+            workers of the model.
+        """
+        self.priorities = tuple(priorities)
+        self.max_active = max_active
+        self._condition = threading.Condition()
+        self._waiting = []
+        self._active = 0
+        self._counter = itertools.count()
+        self._wait_stats = {
+            priority: PriorityWaitStats() for priority in self.priorities
+        }
+
+    def get_wait_stats(self) -> Dict[str, PriorityWaitStats]:
+        """Returns the statistics of the time spent waiting for a turn, per class."""
+        with self._condition:
+            return {
+                priority: replace(stats) for priority, stats in self._wait_stats.items()
+            }
+
+    def _create_turn(self, priority: Optional[str]) -> "PriorityTurn":
+        if priority is None:
+            priority = self.priorities[-1]
+        elif priority not in self.priorities:
+            raise ValueError(
+                "Unknown priority '%s', expected one of: %s"
+                % (priority, ", ".join(self.priorities))
+            )
+        return PriorityTurn(self, priority)
+
+    def _wait(self, priority: str) -> None:
+        with self._condition:
+            entry = (self.priorities.index(priority), next(self._counter))
+            heapq.heappush(self._waiting, entry)
+            wait_start_time = time.monotonic()
+            while self._active >= self.max_active or self._waiting[0] != entry:
+                self._condition.wait()
+            heapq.heappop(self._waiting)
+            self._active += 1
+
+            wait = time.monotonic() - wait_start_time
+            stats = self._wait_stats[priority]
+            stats.num_waits += 1
+            stats.total_wait += wait
+            stats.max_wait = max(stats.max_wait, wait)
+            # The next waiting transcription can also start if a turn is still free.
+            self._condition.notify_all()
+
+    def _release(self) -> None:
+        with self._condition:
+            self._active -= 1
+            self._condition.notify_all()
+
+
+class PriorityTurn:
+    """Turn of a transcription on a model shared with a PriorityScheduler."""
+
+    def __init__(self, scheduler: PriorityScheduler, priority: str):
+        self.scheduler = scheduler
+        self.priority = priority
+        self._held = False
+
+    def acquire(self) -> None:
+        """Waits for the next turn, after handing over the current one if it is held."""
+        self.release()
+        self.scheduler._wait(self.priority)
+        self._held = True
+
+    def release(self) -> None:
+        if self._held:
+            self._held = False
+            self.scheduler._release()
+
+
+class _ScheduledBatch:
+    def __init__(self, features, tokenizer, options, info, cancel_event, callback):
+        self.features = features
+        self.tokenizer = tokenizer
+        self.options = options
+        self.info = info
+        self.cancel_event = cancel_event
+        self.callback = callback
+        self.future = Future()
+        self.submit_time = time.monotonic()
+
+
+class BatchScheduler:
+    """Forms full batches from the chunks of concurrent batched transcriptions.
+
+    The pipelines created with the scheduler submit their batches of chunks, which are
+    queued and encoded together by a background thread, up to `batch_size` chunks. The
+    chunks with equal decoding options, language and task are then decoded together, and
+    the outputs are sent back to the pipelines. A batch of a pipeline is never split.
+    """
+
+    def __init__(
+        self,
+        model: WhisperModel,
+        batch_size: int = 16,
+        max_wait: float = 0.01,
+    ):
+        """Starts the scheduler thread.
+
+        Args:
+          model: The WhisperModel running the batches.
+          batch_size: Maximum number of chunks encoded together.
+          max_wait: Maximum time in seconds a batch waits for the batches of other
+            transcriptions before it is processed. Longer waits fill the batches at the
+            cost of the latency.
+        """
+        self.model = model
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.num_batches = 0
+        self.num_chunks = 0
+        self._pipeline = BatchedInferencePipeline(model)
+        self._queue = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def generate_segment_batched(
+        self,
+        features: np.ndarray,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        info: Optional[TranscriptionInfo] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
+    ) -> Tuple[Optional[ctranslate2.StorageView], List[dict]]:
+        """Submits a batch of chunks and waits for its encoder output and decoded outputs.
+
+        The encoder output is only returned when the word timestamps are enabled.
+        """
+        return self._submit(
+            features, tokenizer, options, info, cancel_event, callback
+        ).result()
+
+    def _submit(
+        self,
+        features: np.ndarray,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        info: Optional[TranscriptionInfo] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
+    ) -> Future:
+        batch = _ScheduledBatch(
+            features, tokenizer, options, info, cancel_event, callback
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The scheduler is closed")
+            self._queue.append(batch)
+            self._condition.notify()
+        return batch.future
+
+    @property
+    def average_batch_size(self) -> float:
+        """Average number of chunks encoded together."""
+        return self.num_chunks / self.num_batches if self.num_batches else 0
+
+    def close(self) -> None:
+        """Stops the scheduler thread after the queued batches are processed."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _run(self) -> None:
+        while True:
+            batches = self._next_batches()
+            if batches is None:
+                break
+            try:
+                self._process(batches)
+            except Exception as e:
+                for batch in batches:
+                    if not batch.future.done():
+                        batch.future.set_exception(e)
+
+    def _next_batches(self) -> Optional[List[_ScheduledBatch]]:
+        with self._condition:
+            while not self._queue and not self._closed:
+                self._condition.wait()
+            if not self._queue:
+                return None
+
+            # Wait for the batches of other transcriptions until the batch is full.
+            deadline = self._queue[0].submit_time + self.max_wait
+            while not self._closed:
+                num_chunks = sum(len(batch.features) for batch in self._queue)
+                timeout = deadline - time.monotonic()
+                if num_chunks >= self.batch_size or timeout <= 0:
+                    break
+                self._condition.wait(timeout)
+
+            batches = []
+            num_chunks = 0
+            for batch in list(self._queue):
+                if batches and num_chunks + len(batch.features) > self.batch_size:
+                    continue
+                self._queue.remove(batch)
+                if batch.cancel_event is not None and batch.cancel_event.is_set():
+                    batch.future.set_result((None, []))
+                    continue
+                batches.append(batch)
+                num_chunks += len(batch.features)
+            return batches
+
+    def _process(self, batches: List[_ScheduledBatch]) -> None:
+        if not batches:
+            return
+
+        features = np.concatenate([batch.features for batch in batches])
+        indices = []
+        start = 0
+        for batch in batches:
+            indices.append(list(range(start, start + len(batch.features))))
+            start += len(batch.features)
+        self.num_batches += 1
+        self.num_chunks += len(features)
+
+        encode_start_time = time.monotonic()
+        encoder_output = self.model.encode(features)
+        encode_elapsed = time.monotonic() - encode_start_time
+        for batch in batches:
+            if batch.callback is not None:
+                batch.callback.on_encoded(len(batch.features), encode_elapsed)
+
+        groups = {}
+        for batch_idx, batch in enumerate(batches):
+            groups.setdefault(
+                get_decoding_key(batch.tokenizer, batch.options, batch.info), []
+            ).append(batch_idx)
+
+        outputs = [None] * len(batches)
+        for group in groups.values():
+            group_indices = [i for batch_idx in group for i in indices[batch_idx]]
+            group_batch = batches[group[0]]
+            decode_start_time = time.monotonic()
+            group_outputs = self._pipeline.decode_segment_batched(
+                (
+                    self.model._select_encoder_output(encoder_output, group_indices)
+                    if len(group_indices) < len(features)
+                    else encoder_output
+                ),
+                [group_batch.tokenizer],
+                group_batch.options,
+                group_batch.info,
+            )[0]
+            decode_elapsed = time.monotonic() - decode_start_time
+
+            for batch_idx in group:
+                batch = batches[batch_idx]
+                outputs[batch_idx] = group_outputs[: len(batch.features)]
+                group_outputs = group_outputs[len(batch.features) :]
+                if batch.callback is not None:
+                    batch.callback.on_decoded(
+                        len(batch.features),
+                        sum(len(output["tokens"]) for output in outputs[batch_idx]),
+                        decode_elapsed,
+                    )
+
+        for batch, batch_indices, batch_outputs in zip(batches, indices, outputs):
+            batch_encoder_output = None
+            if batch.options.word_timestamps:
+                batch_encoder_output = (
+                    self.model._select_encoder_output(encoder_output, batch_indices)
+                    if len(batch_indices) < len(features)
+                    else encoder_output
+                )
+            batch.future.set_result((batch_encoder_output, batch_outputs))
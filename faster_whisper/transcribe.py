@@ -1,13 +1,33 @@
+import asyncio
+import copy
+import hashlib
 import itertools
 import json
 import logging
 import os
+import threading
+import time
 import zlib
 
-from dataclasses import asdict, dataclass
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field, replace
+from functools import partial
 from inspect import signature
 from math import ceil
-from typing import BinaryIO, Iterable, List, Optional, Tuple, Union
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterator,
+    BinaryIO,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
 from warnings import warn
 
 import ctranslate2
@@ -16,18 +36,78 @@ import tokenizers
 
 from tqdm import tqdm
 
-from faster_whisper.audio import decode_audio, pad_or_trim
-from faster_whisper.feature_extractor import FeatureExtractor
+from faster_whisper.audio import decode_audio, decode_audio_blocks, pad_or_trim
+from faster_whisper.feature_extractor import FeatureExtractor, StreamingFeatures
 from faster_whisper.tokenizer import _LANGUAGE_CODES, Tokenizer
 from faster_whisper.utils import download_model, format_timestamp, get_end, get_logger
 from faster_whisper.vad import (
     SpeechTimestampsMap,
     VadOptions,
     collect_chunks,
+    get_chunks_fill_ratio,
     get_speech_timestamps,
+    iterate_chunks,
     merge_segments,
 )
 
+if TYPE_CHECKING:
+    from faster_whisper.scheduler import BatchScheduler, PriorityScheduler, PriorityTurn
+
+# Counters of the TranscriptionInfo updated during the transcription.
+_INFO_COUNTER_FIELDS = (
+    "no_speech_probe_skips",
+    "adaptive_beam_greedy_decodes",
+    "adaptive_beam_escalations",
+    "degradations",
+)
+
+# Decoding arguments of `BatchedInferencePipeline.transcribe` that can differ between the
+# configurations of `BatchedInferencePipeline.transcribe_variants`.
+VARIANT_ARGUMENTS = (
+    "beam_size",
+    "best_of",
+    "patience",
+    "length_penalty",
+    "repetition_penalty",
+    "no_repeat_ngram_size",
+    "temperature",
+    "compression_ratio_threshold",
+    "log_prob_threshold",
+    "no_speech_threshold",
+    "initial_prompt",
+    "suppress_blank",
+    "suppress_tokens",
+    "without_timestamps",
+    "max_new_tokens",
+    "hotwords",
+    "adaptive_beam_log_prob_threshold",
+    "adaptive_beam_compression_ratio_threshold",
+)
+
+# Options used by the batched decoding: the chunks of concurrent transcriptions are decoded
+# together by the BatchScheduler when these options are equal.
+_DECODING_OPTION_FIELDS = (
+    "beam_size",
+    "best_of",
+    "patience",
+    "length_penalty",
+    "repetition_penalty",
+    "no_repeat_ngram_size",
+    "log_prob_threshold",
+    "no_speech_threshold",
+    "compression_ratio_threshold",
+    "temperatures",
+    "initial_prompt",
+    "suppress_blank",
+    "suppress_tokens",
+    "without_timestamps",
+    "max_new_tokens",
+    "hotwords",
+    "multilingual",
+    "adaptive_beam_log_prob_threshold",
+    "adaptive_beam_compression_ratio_threshold",
+)
+
 
 @dataclass
 class Word:
@@ -45,6 +125,26 @@ class Word:
         return asdict(self)
 
 
+class LazyWords:
+    """Words of a segment which are computed when they are first accessed.
+
+    The container is pickled and copied as the list of its words.
+    """
+
+    def __init__(self, load_words: Callable[[], List[Word]]):
+        self._load_words = load_words
+        self._words = None
+
+    def get(self) -> List[Word]:
+        if self._words is None:
+            self._words = self._load_words()
+            self._load_words = None
+        return self._words
+
+    def __reduce__(self):
+        return list, (self.get(),)
+
+
 @dataclass
 class Segment:
     id: int
@@ -68,6 +168,25 @@ class Segment:
         return asdict(self)
 
 
+class LazySegment(Segment):
+    """Segment returned with lazy word timestamps.
+
+    Its words are held in a LazyWords container and computed when `words` is first read,
+    so it can be used like a Segment: `dataclasses.asdict`, copies and pickling compute
+    the words.
+    """
+
+    @property
+    def words(self) -> Optional[List[Word]]:
+        if isinstance(self._words, LazyWords):
+            self._words = self._words.get()
+        return self._words
+
+    @words.setter
+    def words(self, words: Union[None, List[Word], LazyWords]) -> None:
+        self._words = words
+
+
 @dataclass
 class TranscriptionOptions:
     beam_size: int
@@ -96,6 +215,19 @@ class TranscriptionOptions:
     clip_timestamps: Union[str, List[float]]
     hallucination_silence_threshold: Optional[float]
     hotwords: Optional[str]
+    encode_ahead: bool
+    window_batch_size: int
+    no_speech_probe_threshold: Optional[float]
+    repetition_abort_tokens: Optional[int]
+    parallel_fallback: bool
+    adaptive_beam_log_prob_threshold: Optional[float]
+    adaptive_beam_compression_ratio_threshold: Optional[float]
+    time_budget: Optional[float]
+    lazy_word_timestamps: bool
+    word_timestamps_memory_budget: Optional[float]
+    checkpoint_path: Optional[str]
+    checkpoint_interval: float
+    resume_from: Optional[str]
 
 
 @dataclass
@@ -107,21 +239,163 @@ class TranscriptionInfo:
     all_language_probs: Optional[List[Tuple[str, float]]]
     transcription_options: TranscriptionOptions
     vad_options: VadOptions
+    chunk_fill_ratio: Optional[float] = None
+    no_speech_probe_skips: int = 0
+    adaptive_beam_greedy_decodes: int = 0
+    adaptive_beam_escalations: int = 0
+    degradations: List[str] = field(default_factory=list)
+
+
+class TranscriptionCallback:
+    """Receives the events of a transcription.
+
+    The methods are called from the thread iterating over the segments and do nothing by
+    default: subclasses only override the events they need. The elapsed times are in seconds.
+    """
+
+    def on_window_start(self, seek: int, num_frames: int) -> None:
+        """Called before a window of `num_frames` frames starting at frame `seek` is processed."""
+
+    def on_encoded(self, num_windows: int, elapsed: float) -> None:
+        """Called after `num_windows` windows are encoded."""
+
+    def on_decoded(self, num_windows: int, num_tokens: int, elapsed: float) -> None:
+        """Called after `num_windows` windows are decoded into `num_tokens` tokens."""
+
+    def on_segment(self, segment: Segment) -> None:
+        """Called before a segment is yielded.
+
+        With `vad_filter`, the timestamps of the sequential pipeline are still relative to
+        the audio after VAD: they are restored when the segment is yielded.
+        """
+
+    def on_batch_done(
+        self, num_windows: int, num_segments: int, elapsed: float
+    ) -> None:
+        """Called after a batch of `num_windows` windows produced `num_segments` segments.
+
+        The sequential pipeline processes one window per batch.
+        """
 
 
 class BatchedInferencePipeline:
     def __init__(
         self,
         model,
+        scheduler: Optional["BatchScheduler"] = None,
     ):
+        """Initializes the batched pipeline.
+
+        Args:
+          model: The WhisperModel running the batches.
+          scheduler: A BatchScheduler shared by several pipelines of the same model. The
+            batches of the transcriptions with a single task, and the chunks of each input
+            of `transcribe_many`, are then submitted to the scheduler, which encodes and
+            decodes them together with the batches of the other pipelines. The
+            transcriptions with several tasks and `transcribe_variants` do not use the
+            scheduler, since they decode each batch several times from one encoder output.
+            A pipeline should only run one transcription at a time: the concurrent
+            transcriptions use one pipeline each.
+        """
         self.model: WhisperModel = model
+        self.scheduler = scheduler
         self.last_speech_timestamp = 0.0
 
-    def forward(self, features, tokenizer, chunks_metadata, options):
-        encoder_output, outputs = self.generate_segment_batched(
-            features, tokenizer, options
-        )
+    def forward(
+        self,
+        features,
+        tokenizer,
+        chunks_metadata,
+        options,
+        info=None,
+        cancel_event=None,
+        callback=None,
+        lazy_words=None,
+        variants=None,
+    ):
+        if variants is None:
+            generate_segment_batched = (
+                self.scheduler.generate_segment_batched
+                if self.scheduler is not None
+                else self.generate_segment_batched
+            )
+            encoder_output, outputs = generate_segment_batched(
+                features, tokenizer, options, info, cancel_event, callback
+            )
+            if cancel_event is not None and cancel_event.is_set():
+                return []
+
+            segmented_outputs, self.last_speech_timestamp = self._segment_outputs(
+                features,
+                encoder_output,
+                outputs,
+                tokenizer,
+                chunks_metadata,
+                options,
+                self.last_speech_timestamp,
+                lazy_words,
+            )
+            return segmented_outputs
+
+        encode_start_time = time.monotonic()
+        encoder_output = self.model.encode(features)
+        if callback is not None:
+            callback.on_encoded(features.shape[0], time.monotonic() - encode_start_time)
+
+        # Consecutive variants sharing their options only differ by their task, and are
+        # decoded in a single batch.
+        variant_outputs = []
+        for _, group in itertools.groupby(variants, key=lambda variant: id(variant[1])):
+            if cancel_event is not None and cancel_event.is_set():
+                return [[] for _ in variants]
+
+            group = list(group)
+            _, variant_options, variant_info = group[0]
+            variant_outputs.extend(
+                self.decode_segment_batched(
+                    encoder_output,
+                    [variant_tokenizer for variant_tokenizer, _, _ in group],
+                    variant_options,
+                    variant_info,
+                    cancel_event,
+                    callback,
+                )
+            )
+        if cancel_event is not None and cancel_event.is_set():
+            return [[] for _ in variants]
+
+        # The speech timestamps do not depend on the variant, so the word timestamps of
+        # all variants start from the same last speech timestamp.
+        variant_outputs = [
+            self._segment_outputs(
+                features,
+                encoder_output,
+                outputs,
+                variant_tokenizer,
+                chunks_metadata,
+                variant_options,
+                self.last_speech_timestamp,
+                lazy_words,
+            )
+            for (variant_tokenizer, variant_options, _), outputs in zip(
+                variants, variant_outputs
+            )
+        ]
+        self.last_speech_timestamp = variant_outputs[0][1]
 
+        return [segmented_outputs for segmented_outputs, _ in variant_outputs]
+
+    def _segment_outputs(
+        self,
+        features,
+        encoder_output,
+        outputs,
+        tokenizer,
+        chunks_metadata,
+        options,
+        last_speech_timestamp,
+        lazy_words=None,
+    ):
         segmented_outputs = []
         segment_sizes = []
         for chunk_metadata, output in zip(chunks_metadata, outputs):
@@ -146,6 +420,7 @@ class BatchedInferencePipeline:
                         text=tokenizer.decode(subsegment["tokens"]),
                         avg_logprob=output["avg_logprob"],
                         no_speech_prob=output["no_speech_prob"],
+                        temperature=output["temperature"],
                         tokens=subsegment["tokens"],
                         start=subsegment["start"],
                         end=subsegment["end"],
@@ -159,26 +434,74 @@ class BatchedInferencePipeline:
                     for subsegment in subsegments
                 ]
             )
-        if options.word_timestamps:
-            self.last_speech_timestamp = self.model.add_word_timestamps(
+        if options.word_timestamps and lazy_words is not None:
+            for i, segments in enumerate(segmented_outputs):
+                window_idx = lazy_words.add_window(
+                    features[i],
+                    segment_sizes[i],
+                    segments,
+                    tokenizer,
+                    (
+                        self.model._select_encoder_output(encoder_output, [i])
+                        if len(segmented_outputs) > 1
+                        else encoder_output
+                    ),
+                    last_speech_timestamp,
+                )
+                for segment_idx, segment in enumerate(segments):
+                    segment["lazy_words"] = (window_idx, segment_idx)
+                if segments:
+                    last_speech_timestamp = segments[-1]["end"]
+        elif options.word_timestamps:
+            last_speech_timestamp = self.model.add_word_timestamps(
                 segmented_outputs,
                 tokenizer,
                 encoder_output,
                 segment_sizes,
                 options.prepend_punctuations,
                 options.append_punctuations,
-                self.last_speech_timestamp,
+                last_speech_timestamp,
             )
 
-        return segmented_outputs
+        return segmented_outputs, last_speech_timestamp
 
     def generate_segment_batched(
         self,
         features: np.ndarray,
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
+        info: Optional[TranscriptionInfo] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
     ):
-        batch_size = features.shape[0]
+        encode_start_time = time.monotonic()
+        encoder_output = self.model.encode(features)
+        if callback is not None:
+            callback.on_encoded(features.shape[0], time.monotonic() - encode_start_time)
+        if cancel_event is not None and cancel_event.is_set():
+            return encoder_output, []
+
+        outputs = self.decode_segment_batched(
+            encoder_output, [tokenizer], options, info, cancel_event, callback
+        )
+        return encoder_output, outputs[0]
+
+    def decode_segment_batched(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        tokenizers: List[Tokenizer],
+        options: TranscriptionOptions,
+        info: Optional[TranscriptionInfo] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
+    ) -> List[List[dict]]:
+        """Decodes a batch of encoded chunks once per tokenizer.
+
+        The tokenizers can only differ by their task. One list of outputs is returned per
+        tokenizer.
+        """
+        batch_size = encoder_output.shape[0]
+        tokenizer = tokenizers[0]
 
         prompt = self.model.get_prompt(
             tokenizer,
@@ -207,7 +530,8 @@ class BatchedInferencePipeline:
                 f"so that their combined length is less that {self.model.max_length}."
             )
 
-        encoder_output = self.model.encode(features)
+        decode_start_time = time.monotonic()
+
         prompts = [prompt.copy() for _ in range(batch_size)]
 
         if options.multilingual:
@@ -220,43 +544,163 @@ class BatchedInferencePipeline:
             for i, language_token in enumerate(language_tokens):
                 prompts[i][language_token_index] = language_token
 
-        results = self.model.model.generate(
-            encoder_output,
-            prompts,
-            beam_size=options.beam_size,
-            patience=options.patience,
+        if len(tokenizers) > 1:
+            # The prompts of the tasks only differ by the task token, so all tasks are
+            # decoded in a single batch by repeating the encoder output.
+            task_token_index = prompt.index(tokenizer.task)
+            prompts = [
+                prompt[:task_token_index]
+                + [task_tokenizer.task]
+                + prompt[task_token_index + 1 :]
+                for task_tokenizer in tokenizers
+                for prompt in prompts
+            ]
+            encoder_output = self.model._select_encoder_output(
+                encoder_output, list(range(batch_size)) * len(tokenizers)
+            )
+
+        generate_kwargs = dict(
             length_penalty=options.length_penalty,
             max_length=max_length,
             suppress_blank=options.suppress_blank,
             suppress_tokens=options.suppress_tokens,
             return_scores=True,
             return_no_speech_prob=True,
-            sampling_temperature=options.temperatures[0],
             repetition_penalty=options.repetition_penalty,
             no_repeat_ngram_size=options.no_repeat_ngram_size,
         )
 
-        output = []
-        for result in results:
-            # return scores
-            seq_len = len(result.sequences_ids[0])
-            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+        results = self.model._generate_with_adaptive_beam(
+            encoder_output,
+            prompts,
+            tokenizer,
+            options,
+            info,
+            beam_size=options.beam_size,
+            patience=options.patience,
+            sampling_temperature=options.temperatures[0],
+            **generate_kwargs,
+        )
+
+        decode_results = [
+            self.model._get_decode_result(
+                result, options.temperatures[0], tokenizer, options
+            )
+            for result in results
+        ]
+        decode_results = self.generate_with_fallback_batched(
+            encoder_output,
+            prompts,
+            decode_results,
+            tokenizer,
+            options,
+            generate_kwargs,
+            info,
+            cancel_event,
+        )
+        if callback is not None:
+            callback.on_decoded(
+                len(decode_results),
+                sum(len(result.sequences_ids[0]) for result, *_ in decode_results),
+                time.monotonic() - decode_start_time,
+            )
 
+        output = []
+        for result, avg_logprob, temperature, _ in decode_results:
             output.append(
                 dict(
-                    avg_logprob=cum_logprob / (seq_len + 1),
+                    avg_logprob=avg_logprob,
                     no_speech_prob=result.no_speech_prob,
                     tokens=result.sequences_ids[0],
+                    temperature=temperature,
+                )
+            )
+
+        return [output[i : i + batch_size] for i in range(0, len(output), batch_size)]
+
+    def generate_with_fallback_batched(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompts: List[List[int]],
+        decode_results: List[tuple],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        generate_kwargs: dict,
+        info: Optional[TranscriptionInfo] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> List[tuple]:
+        """Decodes again the failed chunks of a batch at the next temperatures.
+
+        The chunks failing the thresholds are batched together at each temperature, reusing
+        their encoder outputs, and the results are selected with the same rules as
+        WhisperModel.generate_with_fallback.
+        """
+        all_results = [[decode_result] for decode_result in decode_results]
+        failed = [
+            i
+            for i, decode_result in enumerate(decode_results)
+            if self.model._needs_fallback(decode_result, options)
+        ]
+
+        temperature = options.temperatures[0]
+        for temperature in options.temperatures[1:]:
+            if not failed or (cancel_event is not None and cancel_event.is_set()):
+                break
+
+            self.model.logger.debug(
+                "Decoding %d chunks again with temperature %.1f",
+                len(failed),
+                temperature,
+            )
+
+            results = self.model._generate_with_adaptive_beam(
+                self.model._select_encoder_output(encoder_output, failed),
+                [prompts[i] for i in failed],
+                tokenizer,
+                options,
+                info,
+                **self.model._get_temperature_kwargs(temperature, options),
+                **generate_kwargs,
+            )
+
+            still_failed = []
+            for i, result in zip(failed, results):
+                decode_result = self.model._get_decode_result(
+                    result, temperature, tokenizer, options
                 )
+                all_results[i].append(decode_result)
+                if self.model._needs_fallback(decode_result, options):
+                    still_failed.append(i)
+                else:
+                    decode_results[i] = decode_result
+            failed = still_failed
+
+        for i in failed:
+            # all failed, select the result with the highest average log probability
+            below_cr_threshold_results = [
+                decode_result
+                for decode_result in all_results[i]
+                if options.compression_ratio_threshold is not None
+                and decode_result[3] <= options.compression_ratio_threshold
+            ]
+            decode_result = max(
+                below_cr_threshold_results or all_results[i], key=lambda x: x[1]
+            )
+            # to pass final temperature like the sequential fallback
+            decode_results[i] = (
+                decode_result[0],
+                decode_result[1],
+                temperature,
+                decode_result[3],
             )
 
-        return encoder_output, output
+        return decode_results
 
     def transcribe(
         self,
         audio: Union[str, BinaryIO, np.ndarray],
         language: Optional[str] = None,
-        task: str = "transcribe",
+        task: Union[str, Tuple[str, ...]] = "transcribe",
         log_progress: bool = False,
         beam_size: int = 5,
         best_of: int = 5,
@@ -264,14 +708,7 @@ class BatchedInferencePipeline:
         length_penalty: float = 1,
         repetition_penalty: float = 1,
         no_repeat_ngram_size: int = 0,
-        temperature: Union[float, List[float], Tuple[float, ...]] = [
-            0.0,
-            0.2,
-            0.4,
-            0.6,
-            0.8,
-            1.0,
-        ],
+        temperature: Union[float, List[float], Tuple[float, ...]] = 0.0,
         compression_ratio_threshold: Optional[float] = 2.4,
         log_prob_threshold: Optional[float] = -1.0,
         no_speech_threshold: Optional[float] = 0.6,
@@ -297,6 +734,24 @@ class BatchedInferencePipeline:
         hotwords: Optional[str] = None,
         language_detection_threshold: Optional[float] = 0.5,
         language_detection_segments: int = 1,
+        encode_ahead: bool = False,
+        window_batch_size: int = 1,
+        no_speech_probe_threshold: Optional[float] = None,
+        repetition_abort_tokens: Optional[int] = None,
+        parallel_fallback: bool = False,
+        adaptive_beam_log_prob_threshold: Optional[float] = None,
+        adaptive_beam_compression_ratio_threshold: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
+        lazy_word_timestamps: bool = False,
+        word_timestamps_memory_budget: Optional[float] = None,
+        streaming: bool = False,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = 60,
+        resume_from: Optional[str] = None,
+        priority_scheduler: Optional["PriorityScheduler"] = None,
+        priority: Optional[str] = None,
     ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
         """transcribe audio in chunks in batched fashion and return with language info.
 
@@ -305,7 +760,10 @@ class BatchedInferencePipeline:
             language: The language spoken in the audio. It should be a language code such
                 as "en" or "fr". If not set, the language will be detected in the first 30 seconds
                 of audio.
-            task: Task to execute (transcribe or translate).
+            task: Task to execute (transcribe or translate). A tuple of tasks, such as
+                ("transcribe", "translate"), decodes the chunks once per task from the same
+                encoder output and returns one segments generator per task. The generators
+                are aligned on the chunks and should be consumed from the same thread.
             log_progress: whether to show progress bar or not.
             beam_size: Beam size to use for decoding.
             best_of: Number of candidates when sampling with non-zero temperature.
@@ -314,8 +772,20 @@ class BatchedInferencePipeline:
             repetition_penalty: Penalty applied to the score of previously generated tokens
                 (set > 1 to penalize).
             no_repeat_ngram_size: Prevent repetitions of ngrams with this size (set 0 to disable).
-            temperature: Temperature for sampling. If a list or tuple is passed,
-                only the first value is used.
+            temperature: Temperature for sampling. It can be a tuple of temperatures, which
+                will be successively used upon failures according to either
+                `compression_ratio_threshold` or `log_prob_threshold`. The failed chunks of a
+                batch are decoded again together at the next temperature. Unlike
+                `WhisperModel.transcribe`, the default is a single temperature so that each
+                batch is decoded once: the fallback is only enabled by passing several
+                temperatures.
+            compression_ratio_threshold: If the gzip compression ratio is above this value,
+                treat as failed.
+            log_prob_threshold: If the average log probability over sampled tokens is
+                below this value, treat as failed.
+            no_speech_threshold: If the no_speech probability is higher than this value AND
+                the average log probability over sampled tokens is below `log_prob_threshold`,
+                consider the chunk as silent and do not decode it again.
             initial_prompt: Optional text string or iterable of token ids to provide as a
                 prompt for the each window.
             suppress_blank: Suppress blank outputs at the beginning of the sampling.
@@ -348,15 +818,46 @@ class BatchedInferencePipeline:
             language_detection_threshold: If the maximum probability of the language tokens is
                 higher than this value, the language is detected.
             language_detection_segments: Number of segments to consider for the language detection.
+            adaptive_beam_log_prob_threshold: If set, the chunks are first decoded with greedy
+                search, and the beam search only runs when the average log probability of the
+                greedy decoding is below this value.
+            adaptive_beam_compression_ratio_threshold: If set, the chunks are first decoded
+                with greedy search, and the beam search only runs when the gzip compression
+                ratio of the greedy decoding is above this value.
+            time_budget: Time budget of the transcription in seconds, measured from the first
+                segment request. When the total time projected before each batch exceeds the
+                budget, the decoding is degraded by one step: beam search is replaced by greedy
+                search, then the temperature fallback and the word timestamps are disabled. The
+                applied degradations are listed in `TranscriptionInfo.degradations`.
+            cancel_event: A threading.Event to cancel the transcription from another thread. It
+                is checked before each batch and between the encoding and decoding steps of a
+                batch: once it is set, the segments generator stops and releases the features
+                and encoder outputs.
+            callback: A TranscriptionCallback receiving the window, encoding, decoding, segment
+                and batch events with their timing and size. Each VAD chunk is a window.
+            lazy_word_timestamps: If True and word_timestamps is True, the word timestamps of
+                a chunk are only computed when the `words` of one of its segments are first
+                accessed. The segments are then instances of LazySegment, and their
+                timestamps are not refined by the word alignment.
+            word_timestamps_memory_budget: Maximum size in MB of the encoder outputs kept for
+                the lazy word timestamps. When it is exceeded, the oldest encoder outputs are
+                dropped and their chunks are encoded again when their words are accessed.
+                None keeps all encoder outputs.
+            checkpoint_path: Path of a JSON file where the state of the transcription and the
+                segments generated so far are written between batches, at most every
+                `checkpoint_interval` seconds, and when the transcription ends or is
+                cancelled.
+            checkpoint_interval: Minimum time in seconds between two checkpoints.
+            resume_from: Path of a checkpoint written by a transcription of the same audio
+                with the same options. The segments of the checkpoint are yielded first and
+                the transcription continues from the next batch. Checkpoints do not support
+                lazy word timestamps.
+            priority_scheduler: A PriorityScheduler sharing the model with other
+                transcriptions. The transcription waits for its turn before each batch.
+            priority: Priority class of the transcription in `priority_scheduler`. If not
+                set, the lowest class.
 
         Unused Arguments
-            compression_ratio_threshold: If the gzip compression ratio is above this value,
-                treat as failed.
-            log_prob_threshold: If the average log probability over sampled tokens is
-                below this value, treat as failed.
-            no_speech_threshold: If the no_speech probability is higher than this value AND
-                the average log probability over sampled tokens is below `log_prob_threshold`,
-                consider the segment as silent.
             condition_on_previous_text: If True, the previous output of the model is provided
                 as a prompt for the next window; disabling may make the text inconsistent across
                 windows, but the model becomes less prone to getting stuck in a failure loop,
@@ -368,21 +869,289 @@ class BatchedInferencePipeline:
             hallucination_silence_threshold: Optional[float]
                 When word_timestamps is True, skip silent periods longer than this threshold
                 (in seconds) when a possible hallucination is detected. set as None.
+
+        Unsupported Arguments
+            encode_ahead, window_batch_size, no_speech_probe_threshold,
+            repetition_abort_tokens, parallel_fallback, streaming: Options of the sequential
+                `WhisperModel.transcribe`, which have no equivalent in the batched
+                transcription. A ValueError is raised when they are not left to their
+                default value.
         Returns:
           A tuple with:
 
+            - a generator over transcribed segments, or a tuple of generators when a tuple
+              of tasks is given
+            - an instance of TranscriptionInfo
+        """
+
+        self._check_supported_arguments(locals())
+        if not isinstance(task, str) and not self.model.model.is_multilingual:
+            raise ValueError("Several tasks require a multilingual model")
+
+        features, chunks_metadata, clip_timestamps, info = self._prepare_chunks(
+            audio,
+            language,
+            vad_filter,
+            vad_parameters,
+            chunk_length,
+            clip_timestamps,
+            language_detection_threshold,
+            language_detection_segments,
+        )
+
+        tokenizers = [
+            Tokenizer(
+                self.model.hf_tokenizer,
+                self.model.model.is_multilingual,
+                task=task_name,
+                language=info.language,
+            )
+            for task_name in ([task] if isinstance(task, str) else task)
+        ]
+        tokenizer = tokenizers[0]
+        if isinstance(task, str):
+            tokenizers = None
+
+        options = self._get_transcription_options(tokenizer, clip_timestamps, locals())
+        info.transcription_options = options
+        turn = (
+            priority_scheduler._create_turn(priority)
+            if priority_scheduler is not None
+            else None
+        )
+
+        segments = self._batched_segments_generator(
+            features,
+            tokenizer,
+            chunks_metadata,
+            batch_size,
+            options,
+            log_progress,
+            info,
+            cancel_event,
+            callback,
+            (
+                [(task_tokenizer, options, info) for task_tokenizer in tokenizers]
+                if tokenizers is not None
+                else None
+            ),
+            turn,
+        )
+        if turn is not None:
+            segments = release_turn_segments(segments, turn)
+
+        if tokenizers is not None:
+            segments = split_variant_segments(segments, len(tokenizers))
+
+        return segments, info
+
+    def transcribe_variants(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        variants: List[dict],
+        **kwargs,
+    ) -> List[Tuple[Iterable[Segment], TranscriptionInfo]]:
+        """Transcribes the audio with several decoding configurations.
+
+        The chunks are encoded once and each configuration is decoded from the same encoder
+        output, which is cheaper than calling `transcribe` once per configuration. The
+        batches are run by the pipeline itself, even when it has a BatchScheduler.
+
+        Arguments:
+            audio: Path to the input file (or a file-like object), or the audio waveform.
+            variants: List of dictionaries of decoding arguments of `transcribe` overriding
+                the keyword arguments for one configuration, for example
+                [{"beam_size": 1}, {"beam_size": 5, "initial_prompt": "Glossary: ..."}].
+                The supported arguments are the ones listed in `VARIANT_ARGUMENTS`.
+            **kwargs: Arguments of `transcribe` shared by all configurations. `task` must be a
+                single task.
+
+        Returns:
+          A list with one tuple per configuration of:
+
             - a generator over transcribed segments
             - an instance of TranscriptionInfo
+
+          The generators are aligned on the chunks and should be consumed from the same
+          thread.
         """
+        for variant in variants:
+            unsupported = set(variant) - set(VARIANT_ARGUMENTS)
+            if unsupported:
+                raise ValueError(
+                    "Unsupported variant arguments: %s" % ", ".join(sorted(unsupported))
+                )
 
-        sampling_rate = self.model.feature_extractor.sampling_rate
+        arguments = signature(self.transcribe).bind(audio, **kwargs)
+        arguments.apply_defaults()
+        arguments = arguments.arguments
+        self._check_supported_arguments(arguments)
+        if not isinstance(arguments["task"], str):
+            raise ValueError("Variants require a single task")
+
+        features, chunks_metadata, clip_timestamps, info = self._prepare_chunks(
+            audio,
+            arguments["language"],
+            arguments["vad_filter"],
+            arguments["vad_parameters"],
+            arguments["chunk_length"],
+            arguments["clip_timestamps"],
+            arguments["language_detection_threshold"],
+            arguments["language_detection_segments"],
+        )
 
-        if multilingual and not self.model.model.is_multilingual:
-            self.model.logger.warning(
-                "The current model is English-only but the multilingual parameter is set to"
-                "True; setting to False instead."
+        tokenizer = Tokenizer(
+            self.model.hf_tokenizer,
+            self.model.model.is_multilingual,
+            task=arguments["task"],
+            language=info.language,
+        )
+
+        variant_infos = []
+        for variant in variants:
+            options = self._get_transcription_options(
+                tokenizer, clip_timestamps, {**arguments, **variant}
             )
-            multilingual = False
+            variant_infos.append(
+                replace(info, transcription_options=options, degradations=[])
+            )
+
+        turn = (
+            arguments["priority_scheduler"]._create_turn(arguments["priority"])
+            if arguments["priority_scheduler"] is not None
+            else None
+        )
+
+        segments = self._batched_segments_generator(
+            features,
+            tokenizer,
+            chunks_metadata,
+            arguments["batch_size"],
+            variant_infos[0].transcription_options,
+            arguments["log_progress"],
+            variant_infos[0],
+            arguments["cancel_event"],
+            arguments["callback"],
+            [
+                (tokenizer, variant_info.transcription_options, variant_info)
+                for variant_info in variant_infos
+            ],
+            turn,
+        )
+        if turn is not None:
+            segments = release_turn_segments(segments, turn)
+
+        return list(zip(split_variant_segments(segments, len(variants)), variant_infos))
+
+    def transcribe_many(
+        self,
+        inputs: Iterable[Union[str, BinaryIO, np.ndarray]],
+        batch_size: int = 8,
+        prefetch: int = 2,
+        **kwargs,
+    ) -> Tuple[Iterable[Tuple[int, Segment]], List[TranscriptionInfo]]:
+        """Transcribes several inputs, packing the chunks of consecutive inputs in the same
+        batches.
+
+        The next inputs are decoded, split by the VAD and their language detected in
+        background threads while the current batches run, and the batches are filled with
+        the chunks of the following inputs instead of ending underfilled at the end of each
+        input.
+
+        Arguments:
+            inputs: Iterable of paths, file-like objects or audio waveforms.
+            batch_size: The maximum number of chunks decoded together.
+            prefetch: Number of inputs prepared ahead of the batches.
+            **kwargs: Other arguments of `transcribe`, applied to all inputs. `task` must be
+                a single task, and the checkpoints and the time budget are not supported.
+
+        Returns:
+          A tuple with:
+
+            - a generator over tuples of input index and transcribed segment, in the order
+              of the inputs
+            - the list of TranscriptionInfo of the inputs. The info of an input is appended
+              when the input is prepared, before its first segment is yielded.
+        """
+        arguments = signature(self.transcribe).bind(
+            None, batch_size=batch_size, **kwargs
+        )
+        arguments.apply_defaults()
+        arguments = arguments.arguments
+        self._check_supported_arguments(arguments)
+        if not isinstance(arguments["task"], str):
+            raise ValueError("Several inputs require a single task")
+        for name in ("checkpoint_path", "resume_from", "time_budget"):
+            if arguments[name] is not None:
+                raise ValueError("Several inputs do not support %s" % name)
+
+        def prepare(audio):
+            vad_parameters = arguments["vad_parameters"]
+            features, chunks_metadata, clip_timestamps, info = self._prepare_chunks(
+                audio,
+                arguments["language"],
+                arguments["vad_filter"],
+                (
+                    dict(vad_parameters)
+                    if isinstance(vad_parameters, dict)
+                    else vad_parameters
+                ),
+                arguments["chunk_length"],
+                arguments["clip_timestamps"],
+                arguments["language_detection_threshold"],
+                arguments["language_detection_segments"],
+            )
+            tokenizer = Tokenizer(
+                self.model.hf_tokenizer,
+                self.model.model.is_multilingual,
+                task=arguments["task"],
+                language=info.language,
+            )
+            info.transcription_options = self._get_transcription_options(
+                tokenizer, clip_timestamps, arguments
+            )
+            return features, chunks_metadata, tokenizer, info
+
+        infos = []
+        turn = (
+            arguments["priority_scheduler"]._create_turn(arguments["priority"])
+            if arguments["priority_scheduler"] is not None
+            else None
+        )
+
+        segments = self._many_segments_generator(
+            inputs,
+            prepare,
+            batch_size,
+            prefetch,
+            infos,
+            arguments["log_progress"],
+            arguments["cancel_event"],
+            arguments["callback"],
+            turn,
+        )
+        if turn is not None:
+            segments = release_turn_segments(segments, turn)
+
+        return segments, infos
+
+    def _prepare_chunks(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        language: Optional[str],
+        vad_filter: bool,
+        vad_parameters: Optional[Union[dict, VadOptions]],
+        chunk_length: Optional[int],
+        clip_timestamps: Optional[List[dict]],
+        language_detection_threshold: Optional[float],
+        language_detection_segments: int,
+    ) -> Tuple[Union[np.ndarray, list], List[dict], List[dict], TranscriptionInfo]:
+        """Splits the audio in chunks and computes their features.
+
+        Returns the stacked features, the chunks metadata, the clip timestamps and the
+        transcription info without its transcription options.
+        """
+        sampling_rate = self.model.feature_extractor.sampling_rate
 
         if not isinstance(audio, np.ndarray):
             audio = decode_audio(audio, sampling_rate=sampling_rate)
@@ -430,6 +1199,11 @@ class BatchedInferencePipeline:
             format_timestamp(duration - duration_after_vad),
         )
 
+        chunk_fill_ratio = get_chunks_fill_ratio(
+            clip_timestamps, chunk_length, sampling_rate
+        )
+        self.model.logger.debug("Chunk fill ratio is %.2f", chunk_fill_ratio)
+
         audio_chunks, chunks_metadata = collect_chunks(audio, clip_timestamps)
         features = (
             [self.model.feature_extractor(chunk)[..., :-1] for chunk in audio_chunks]
@@ -475,114 +1249,549 @@ class BatchedInferencePipeline:
 
             language_probability = 1
 
-        tokenizer = Tokenizer(
-            self.model.hf_tokenizer,
-            self.model.model.is_multilingual,
-            task=task,
-            language=language,
-        )
-
         features = (
             np.stack([pad_or_trim(feature) for feature in features]) if features else []
         )
 
-        options = TranscriptionOptions(
-            beam_size=beam_size,
-            best_of=best_of,
-            patience=patience,
-            length_penalty=length_penalty,
-            repetition_penalty=repetition_penalty,
-            no_repeat_ngram_size=no_repeat_ngram_size,
-            log_prob_threshold=log_prob_threshold,
-            no_speech_threshold=no_speech_threshold,
-            compression_ratio_threshold=compression_ratio_threshold,
+        info = TranscriptionInfo(
+            language=language,
+            language_probability=language_probability,
+            duration=duration,
+            duration_after_vad=duration_after_vad,
+            transcription_options=None,
+            vad_options=vad_parameters,
+            all_language_probs=all_language_probs,
+            chunk_fill_ratio=chunk_fill_ratio,
+        )
+
+        return features, chunks_metadata, clip_timestamps, info
+
+    def _check_supported_arguments(self, arguments: dict) -> None:
+        """Raises when an argument of the sequential transcription is set."""
+        parameters = signature(self.transcribe).parameters
+        for name in (
+            "encode_ahead",
+            "window_batch_size",
+            "no_speech_probe_threshold",
+            "repetition_abort_tokens",
+            "parallel_fallback",
+            "streaming",
+        ):
+            if arguments[name] != parameters[name].default:
+                raise ValueError("The batched transcription does not support %s" % name)
+
+    def _get_transcription_options(
+        self, tokenizer: Tokenizer, clip_timestamps: List[dict], arguments: dict
+    ) -> TranscriptionOptions:
+        """Builds the transcription options from the arguments of `transcribe`."""
+        if (
+            (
+                arguments["checkpoint_path"] is not None
+                or arguments["resume_from"] is not None
+            )
+            and arguments["word_timestamps"]
+            and arguments["lazy_word_timestamps"]
+        ):
+            raise ValueError("Checkpoints do not support lazy word timestamps")
+
+        multilingual = arguments["multilingual"]
+        if multilingual and not self.model.model.is_multilingual:
+            self.model.logger.warning(
+                "The current model is English-only but the multilingual parameter is set to"
+                "True; setting to False instead."
+            )
+            multilingual = False
+
+        return TranscriptionOptions(
+            beam_size=arguments["beam_size"],
+            best_of=arguments["best_of"],
+            patience=arguments["patience"],
+            length_penalty=arguments["length_penalty"],
+            repetition_penalty=arguments["repetition_penalty"],
+            no_repeat_ngram_size=arguments["no_repeat_ngram_size"],
+            log_prob_threshold=arguments["log_prob_threshold"],
+            no_speech_threshold=arguments["no_speech_threshold"],
+            compression_ratio_threshold=arguments["compression_ratio_threshold"],
             temperatures=(
-                temperature[:1]
-                if isinstance(temperature, (list, tuple))
-                else [temperature]
+                arguments["temperature"]
+                if isinstance(arguments["temperature"], (list, tuple))
+                else [arguments["temperature"]]
             ),
-            initial_prompt=initial_prompt,
-            prefix=prefix,
-            suppress_blank=suppress_blank,
+            initial_prompt=arguments["initial_prompt"],
+            prefix=arguments["prefix"],
+            suppress_blank=arguments["suppress_blank"],
             suppress_tokens=(
-                get_suppressed_tokens(tokenizer, suppress_tokens)
-                if suppress_tokens
-                else suppress_tokens
+                get_suppressed_tokens(tokenizer, arguments["suppress_tokens"])
+                if arguments["suppress_tokens"]
+                else arguments["suppress_tokens"]
             ),
-            prepend_punctuations=prepend_punctuations,
-            append_punctuations=append_punctuations,
-            max_new_tokens=max_new_tokens,
-            hotwords=hotwords,
-            word_timestamps=word_timestamps,
+            prepend_punctuations=arguments["prepend_punctuations"],
+            append_punctuations=arguments["append_punctuations"],
+            max_new_tokens=arguments["max_new_tokens"],
+            hotwords=arguments["hotwords"],
+            word_timestamps=arguments["word_timestamps"],
             hallucination_silence_threshold=None,
+            encode_ahead=False,
+            window_batch_size=1,
+            no_speech_probe_threshold=None,
+            repetition_abort_tokens=None,
+            parallel_fallback=False,
+            adaptive_beam_log_prob_threshold=arguments[
+                "adaptive_beam_log_prob_threshold"
+            ],
+            adaptive_beam_compression_ratio_threshold=(
+                arguments["adaptive_beam_compression_ratio_threshold"]
+            ),
+            time_budget=arguments["time_budget"],
+            lazy_word_timestamps=arguments["lazy_word_timestamps"],
+            word_timestamps_memory_budget=arguments["word_timestamps_memory_budget"],
+            checkpoint_path=arguments["checkpoint_path"],
+            checkpoint_interval=arguments["checkpoint_interval"],
+            resume_from=arguments["resume_from"],
             condition_on_previous_text=False,
             clip_timestamps=clip_timestamps,
             prompt_reset_on_temperature=0.5,
             multilingual=multilingual,
-            without_timestamps=without_timestamps,
+            without_timestamps=arguments["without_timestamps"],
             max_initial_timestamp=0.0,
         )
 
-        info = TranscriptionInfo(
-            language=language,
-            language_probability=language_probability,
-            duration=duration,
-            duration_after_vad=duration_after_vad,
-            transcription_options=options,
-            vad_options=vad_parameters,
-            all_language_probs=all_language_probs,
-        )
+    def _batched_segments_generator(
+        self,
+        features,
+        tokenizer,
+        chunks_metadata,
+        batch_size,
+        options,
+        log_progress,
+        info=None,
+        cancel_event=None,
+        callback=None,
+        variants=None,
+        turn=None,
+    ):
+        """Yields the segments of the chunks.
 
-        segments = self._batched_segments_generator(
-            features,
-            tokenizer,
-            chunks_metadata,
-            batch_size,
-            options,
-            log_progress,
+        When variants of tokenizer, options and info are given, the chunks are decoded once
+        per variant and tuples of variant index and segment are yielded.
+        """
+        pbar = tqdm(total=len(features), disable=not log_progress, position=0)
+        multiple_variants = variants is not None
+        if not multiple_variants:
+            variants = [(tokenizer, options, info)]
+        checkpoint_key = (
+            get_checkpoint_key(
+                [variant[1] for variant in variants],
+                [variant[0] for variant in variants],
+                len(features),
+            )
+            if options.checkpoint_path is not None or options.resume_from is not None
+            else None
+        )
+        if any(variant[1].time_budget is not None for variant in variants):
+            # Degrade copies of the options so that the infos keep the requested ones.
+            copies = {}
+            variants = [
+                (
+                    variant_tokenizer,
+                    copies.setdefault(id(variant_options), replace(variant_options)),
+                    variant_info,
+                )
+                for variant_tokenizer, variant_options, variant_info in variants
+            ]
+            options = variants[0][1]
+        variant_options_infos = list(
+            {id(variant[1]): variant[1:] for variant in variants}.values()
         )
+        seg_indices = [0] * len(variants)
+        lazy_words = (
+            LazyWordTimestamps(self.model, options)
+            if options.word_timestamps and options.lazy_word_timestamps
+            else None
+        )
+        start_time = time.monotonic()
+        variant_infos = [variant_info for _, variant_info in variant_options_infos]
+
+        next_chunk = 0
+        checkpoint_segments = []
+        if options.resume_from is not None:
+            state = read_checkpoint(options.resume_from, checkpoint_key, variant_infos)
+            next_chunk = state["next_chunk"]
+            seg_indices = state["seg_indices"]
+            self.last_speech_timestamp = state["last_speech_timestamp"]
+            start_time -= state["elapsed"]
+            for (variant_options, _), info_state in zip(
+                variant_options_infos, state["infos"]
+            ):
+                for degradation in info_state["degradations"]:
+                    apply_degradation(variant_options, degradation)
+            pbar.update(next_chunk)
+
+            for variant_idx, segment in state["segments"]:
+                if options.checkpoint_path is not None:
+                    checkpoint_segments.append((variant_idx, segment))
+                segment = segment_from_dict(segment)
+                yield ((variant_idx, segment) if multiple_variants else segment)
+
+        def save_checkpoint():
+            write_checkpoint(
+                options.checkpoint_path,
+                checkpoint_key,
+                dict(
+                    next_chunk=next_chunk,
+                    seg_indices=seg_indices,
+                    last_speech_timestamp=self.last_speech_timestamp,
+                    elapsed=time.monotonic() - start_time,
+                    segments=checkpoint_segments,
+                ),
+                variant_infos,
+            )
 
-        return segments, info
+        checkpoint_time = time.monotonic()
+
+        for i in range(next_chunk, len(features), batch_size):
+            if turn is not None:
+                turn.acquire()
+
+            if cancel_event is not None and cancel_event.is_set():
+                self.model.logger.info("Transcription cancelled")
+                break
+
+            if (
+                options.checkpoint_path is not None
+                and time.monotonic() - checkpoint_time >= options.checkpoint_interval
+            ):
+                save_checkpoint()
+                checkpoint_time = time.monotonic()
+
+            for variant_options, variant_info in variant_options_infos:
+                if variant_options.time_budget is not None:
+                    # The chunks are speech regions from the VAD, so they are never skipped.
+                    self.model._apply_time_budget(
+                        variant_options,
+                        variant_info,
+                        start_time,
+                        i / len(features),
+                        skip_low_speech=False,
+                    )
+
+            batch_start_time = time.monotonic()
+            if callback is not None:
+                for chunk_metadata in chunks_metadata[i : i + batch_size]:
+                    callback.on_window_start(
+                        int(
+                            chunk_metadata["start_time"] * self.model.frames_per_second
+                        ),
+                        int(
+                            (chunk_metadata["end_time"] - chunk_metadata["start_time"])
+                            * self.model.frames_per_second
+                        ),
+                    )
 
-    def _batched_segments_generator(
-        self, features, tokenizer, chunks_metadata, batch_size, options, log_progress
-    ):
-        pbar = tqdm(total=len(features), disable=not log_progress, position=0)
-        seg_idx = 0
-        for i in range(0, len(features), batch_size):
             results = self.forward(
                 features[i : i + batch_size],
                 tokenizer,
                 chunks_metadata[i : i + batch_size],
                 options,
+                info,
+                cancel_event,
+                callback,
+                lazy_words,
+                variants if multiple_variants else None,
             )
-
-            for result in results:
-                for segment in result:
-                    seg_idx += 1
-                    yield Segment(
-                        seek=segment["seek"],
-                        id=seg_idx,
-                        text=segment["text"],
-                        start=round(segment["start"], 3),
-                        end=round(segment["end"], 3),
-                        words=(
-                            None
-                            if not options.word_timestamps
-                            else [Word(**word) for word in segment["words"]]
-                        ),
-                        tokens=segment["tokens"],
-                        avg_logprob=segment["avg_logprob"],
-                        no_speech_prob=segment["no_speech_prob"],
-                        compression_ratio=segment["compression_ratio"],
-                        temperature=options.temperatures[0],
-                    )
+            batch_elapsed = time.monotonic() - batch_start_time
+            variant_results = results if multiple_variants else [results]
+
+            num_segments = 0
+            for chunk_results in zip(*variant_results):
+                for variant_idx, result in enumerate(chunk_results):
+                    word_timestamps = variants[variant_idx][1].word_timestamps
+                    for output in result:
+                        seg_indices[variant_idx] += 1
+                        num_segments += 1
+                        segment = self._build_segment(
+                            output,
+                            seg_indices[variant_idx],
+                            word_timestamps,
+                            lazy_words,
+                        )
+                        if options.checkpoint_path is not None:
+                            checkpoint_segments.append((variant_idx, asdict(segment)))
+                        if callback is not None:
+                            callback.on_segment(segment)
+                        yield ((variant_idx, segment) if multiple_variants else segment)
 
                 pbar.update(1)
 
+            if callback is not None:
+                callback.on_batch_done(
+                    len(variant_results[0]), num_segments, batch_elapsed
+                )
+            next_chunk = i + len(variant_results[0])
+
         pbar.close()
+        if options.checkpoint_path is not None:
+            save_checkpoint()
         self.last_speech_timestamp = 0.0
 
+    def _many_segments_generator(
+        self,
+        inputs,
+        prepare,
+        batch_size,
+        prefetch,
+        infos,
+        log_progress,
+        cancel_event=None,
+        callback=None,
+        turn=None,
+    ):
+        """Yields the tuples of input index and segment of the inputs.
+
+        Each pending chunk is a tuple of input index and chunk index, and the state of each
+        pending input is kept until its last chunk is decoded.
+        """
+        pbar = tqdm(disable=not log_progress, position=0)
+        executor = ThreadPoolExecutor(max_workers=max(prefetch, 1))
+        inputs = enumerate(inputs)
+        prepared = deque()
+        pending_chunks = deque()
+        input_states = {}
+
+        def prefetch_inputs():
+            while len(prepared) < max(prefetch, 1):
+                input_idx, audio = next(inputs, (None, None))
+                if input_idx is None:
+                    break
+                prepared.append((input_idx, executor.submit(prepare, audio)))
+
+        try:
+            prefetch_inputs()
+            while prepared or pending_chunks:
+                while prepared and len(pending_chunks) < batch_size:
+                    input_idx, future = prepared.popleft()
+                    features, chunks_metadata, tokenizer, info = future.result()
+                    prefetch_inputs()
+                    infos.append(info)
+                    if not len(features):
+                        continue
+
+                    options = info.transcription_options
+                    input_states[input_idx] = dict(
+                        features=features,
+                        chunks_metadata=chunks_metadata,
+                        tokenizer=tokenizer,
+                        options=options,
+                        info=info,
+                        num_segments=0,
+                        last_speech_timestamp=0.0,
+                        lazy_words=(
+                            LazyWordTimestamps(self.model, options)
+                            if options.word_timestamps and options.lazy_word_timestamps
+                            else None
+                        ),
+                    )
+                    pending_chunks.extend(
+                        (input_idx, chunk_idx) for chunk_idx in range(len(features))
+                    )
+
+                if not pending_chunks:
+                    continue
+
+                if turn is not None:
+                    turn.acquire()
+
+                if cancel_event is not None and cancel_event.is_set():
+                    self.model.logger.info("Transcription cancelled")
+                    break
+
+                batch_chunks = [
+                    pending_chunks.popleft()
+                    for _ in range(min(batch_size, len(pending_chunks)))
+                ]
+                batch_start_time = time.monotonic()
+                if callback is not None:
+                    for input_idx, chunk_idx in batch_chunks:
+                        chunk_metadata = input_states[input_idx]["chunks_metadata"][
+                            chunk_idx
+                        ]
+                        callback.on_window_start(
+                            int(
+                                chunk_metadata["start_time"]
+                                * self.model.frames_per_second
+                            ),
+                            int(
+                                (
+                                    chunk_metadata["end_time"]
+                                    - chunk_metadata["start_time"]
+                                )
+                                * self.model.frames_per_second
+                            ),
+                        )
+
+                features = np.stack(
+                    [
+                        input_states[input_idx]["features"][chunk_idx]
+                        for input_idx, chunk_idx in batch_chunks
+                    ]
+                )
+                outputs = [None] * len(batch_chunks)
+                encoder_output = None
+                input_encoder_outputs = {}
+                if self.scheduler is not None:
+                    # The chunks of each input are submitted to the scheduler, which encodes
+                    # and decodes them with the batches of the other pipelines.
+                    futures = []
+                    for input_idx, group in itertools.groupby(
+                        range(len(batch_chunks)), key=lambda i: batch_chunks[i][0]
+                    ):
+                        group = list(group)
+                        state = input_states[input_idx]
+                        futures.append(
+                            (
+                                input_idx,
+                                group,
+                                self.scheduler._submit(
+                                    features[group[0] : group[-1] + 1],
+                                    state["tokenizer"],
+                                    state["options"],
+                                    state["info"],
+                                    cancel_event,
+                                    callback,
+                                ),
+                            )
+                        )
+                    for input_idx, group, future in futures:
+                        input_encoder_output, group_outputs = future.result()
+                        input_encoder_outputs[input_idx] = input_encoder_output
+                        for i, output in zip(group, group_outputs):
+                            outputs[i] = output
+                else:
+                    encode_start_time = time.monotonic()
+                    encoder_output = self.model.encode(features)
+                    if callback is not None:
+                        callback.on_encoded(
+                            len(batch_chunks), time.monotonic() - encode_start_time
+                        )
+
+                    # The chunks of the inputs sharing their language and decoding options
+                    # are decoded together.
+                    groups = {}
+                    for i, (input_idx, _) in enumerate(batch_chunks):
+                        state = input_states[input_idx]
+                        key = get_decoding_key(
+                            state["tokenizer"], state["options"], state["info"]
+                        )
+                        groups.setdefault(key, []).append(i)
+
+                    for group in groups.values():
+                        state = input_states[batch_chunks[group[0]][0]]
+                        group_outputs = self.decode_segment_batched(
+                            (
+                                self.model._select_encoder_output(encoder_output, group)
+                                if len(group) < len(batch_chunks)
+                                else encoder_output
+                            ),
+                            [state["tokenizer"]],
+                            state["options"],
+                            state["info"],
+                            cancel_event,
+                            callback,
+                        )[0]
+                        for i, output in zip(group, group_outputs):
+                            outputs[i] = output
+                if cancel_event is not None and cancel_event.is_set():
+                    self.model.logger.info("Transcription cancelled")
+                    break
+                batch_elapsed = time.monotonic() - batch_start_time
+
+                num_segments = 0
+                for input_idx, group in itertools.groupby(
+                    range(len(batch_chunks)), key=lambda i: batch_chunks[i][0]
+                ):
+                    group = list(group)
+                    state = input_states[input_idx]
+                    chunk_indices = [batch_chunks[i][1] for i in group]
+                    if self.scheduler is not None:
+                        input_encoder_output = input_encoder_outputs[input_idx]
+                    elif state["options"].word_timestamps and len(group) < len(
+                        batch_chunks
+                    ):
+                        input_encoder_output = self.model._select_encoder_output(
+                            encoder_output, group
+                        )
+                    else:
+                        input_encoder_output = encoder_output
+                    (
+                        segmented_outputs,
+                        state["last_speech_timestamp"],
+                    ) = self._segment_outputs(
+                        features[group[0] : group[-1] + 1],
+                        input_encoder_output,
+                        [outputs[i] for i in group],
+                        state["tokenizer"],
+                        [state["chunks_metadata"][i] for i in chunk_indices],
+                        state["options"],
+                        state["last_speech_timestamp"],
+                        state["lazy_words"],
+                    )
+
+                    for result in segmented_outputs:
+                        for output in result:
+                            state["num_segments"] += 1
+                            num_segments += 1
+                            segment = self._build_segment(
+                                output,
+                                state["num_segments"],
+                                state["options"].word_timestamps,
+                                state["lazy_words"],
+                            )
+                            if callback is not None:
+                                callback.on_segment(segment)
+                            yield input_idx, segment
+
+                        pbar.update(1)
+
+                    if chunk_indices[-1] == len(state["features"]) - 1:
+                        del input_states[input_idx]
+
+                if callback is not None:
+                    callback.on_batch_done(
+                        len(batch_chunks), num_segments, batch_elapsed
+                    )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            pbar.close()
+
+    def _build_segment(
+        self,
+        output: dict,
+        segment_id: int,
+        word_timestamps: bool,
+        lazy_words: Optional["LazyWordTimestamps"],
+    ) -> Segment:
+        if word_timestamps and lazy_words is not None:
+            segment_class = LazySegment
+            words = lazy_words.get_lazy_words(*output["lazy_words"])
+        else:
+            segment_class = Segment
+            words = (
+                [Word(**word) for word in output["words"]] if word_timestamps else None
+            )
+        return segment_class(
+            seek=output["seek"],
+            id=segment_id,
+            text=output["text"],
+            start=round(output["start"], 3),
+            end=round(output["end"], 3),
+            words=words,
+            tokens=output["tokens"],
+            avg_logprob=output["avg_logprob"],
+            no_speech_prob=output["no_speech_prob"],
+            compression_ratio=output["compression_ratio"],
+            temperature=output["temperature"],
+        )
+
 
 class WhisperModel:
     def __init__(
@@ -746,6 +1955,24 @@ class WhisperModel:
         hotwords: Optional[str] = None,
         language_detection_threshold: Optional[float] = 0.5,
         language_detection_segments: int = 1,
+        encode_ahead: bool = False,
+        window_batch_size: int = 1,
+        no_speech_probe_threshold: Optional[float] = None,
+        repetition_abort_tokens: Optional[int] = None,
+        parallel_fallback: bool = False,
+        adaptive_beam_log_prob_threshold: Optional[float] = None,
+        adaptive_beam_compression_ratio_threshold: Optional[float] = None,
+        time_budget: Optional[float] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
+        lazy_word_timestamps: bool = False,
+        word_timestamps_memory_budget: Optional[float] = None,
+        streaming: bool = False,
+        checkpoint_path: Optional[str] = None,
+        checkpoint_interval: float = 60,
+        resume_from: Optional[str] = None,
+        priority_scheduler: Optional["PriorityScheduler"] = None,
+        priority: Optional[str] = None,
     ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
         """Transcribes an input file.
 
@@ -806,7 +2033,14 @@ class WhisperModel:
           clip_timestamps:
             Comma-separated list start,end,start,end,... timestamps (in seconds) of clips to
              process. The last end timestamp defaults to the end of the file.
-             vad_filter will be ignored if clip_timestamps is used.
+             vad_filter will be ignored if clip_timestamps is used. If set to "vad", the clips
+             are the speech chunks detected with `vad_parameters`, grouped with their
+             neighbours into clips of up to `chunk_length` seconds: they are transcribed from
+             the original audio, without concatenating the speech and restoring the timestamps.
+             The silences between the grouped chunks are transcribed with them, so the number
+             of windows can be slightly higher than with `vad_filter`. The chunks separated by
+             more than `vad_parameters.max_merge_silence_s` seconds of silence, and at most 2
+             seconds, are not grouped.
           hallucination_silence_threshold:
             When word_timestamps is True, skip silent periods longer than this threshold
              (in seconds) when a possible hallucination is detected
@@ -815,6 +2049,90 @@ class WhisperModel:
           language_detection_threshold: If the maximum probability of the language tokens is higher
            than this value, the language is detected.
           language_detection_segments: Number of segments to consider for the language detection.
+          encode_ahead: Encode the next window on a background thread while the current window
+            is decoded. The next window is speculated to start where the current one ends, and
+            the speculative encoding is discarded when the decoded timestamps move the seek
+            elsewhere. The speculation stops when most windows start elsewhere. The encoder
+            and decoder only run concurrently when the model has num_workers >= 2.
+          window_batch_size: When the windows do not depend on each other, that is when
+            condition_on_previous_text, word_timestamps and multilingual are disabled, encode
+            and decode up to this many consecutive windows in a single batch. The windows are
+            speculated to start where the previous one ends: a window is decoded again when the
+            decoded timestamps move its start. The batch size is halved after each
+            misprediction and doubled again when the windows start as speculated. This has no
+            effect when set to 1 or when repetition_abort_tokens is set. Without timestamps,
+            the windows have a fixed stride and always start as speculated.
+          no_speech_probe_threshold: If set, the no speech probability of each window is first
+            computed from a single decoding step, and the window is skipped without running
+            the full decoding when this probability is higher than this value. The number of
+            skipped windows is counted in `TranscriptionInfo.no_speech_probe_skips` as the
+            segments are generated.
+          repetition_abort_tokens: If set, each decoding is checked every this number of
+            tokens. When the tokens are stuck in a repetition loop, according to
+            `compression_ratio_threshold` or a n-gram repeated at the end of the tokens, the
+            decoding is aborted and retried at the next temperature. Without timestamps, the
+            decoding continues from the checked tokens. With timestamps, the window is
+            decoded again from the start up to the next check.
+          parallel_fallback: When the decoding at the first temperature fails, decode the
+            remaining temperatures concurrently instead of one after another, with one
+            decoding in flight per worker of the model. The result is selected with the same
+            rules as the sequential fallback, so this trades extra decodings for a lower
+            latency. The decodings still in flight when a result is accepted are not cancelled
+            and keep their workers busy until they complete. This option requires a model with
+            num_workers >= 2 and is ignored otherwise, and `repetition_abort_tokens` only
+            applies to the first temperature.
+          adaptive_beam_log_prob_threshold: If set, the windows are first decoded with greedy
+            search, and the beam search only runs when the average log probability of the
+            greedy decoding is below this value.
+          adaptive_beam_compression_ratio_threshold: If set, the windows are first decoded with
+            greedy search, and the beam search only runs when the gzip compression ratio of the
+            greedy decoding is above this value. The number of greedy decodings and beam search
+            escalations are counted in `TranscriptionInfo.adaptive_beam_greedy_decodes` and
+            `TranscriptionInfo.adaptive_beam_escalations` as the segments are generated.
+          time_budget: Time budget of the transcription in seconds, measured from the first
+            segment request. The total time is projected from the progress before each window,
+            and when it exceeds the budget the decoding is degraded by one step: beam search is
+            replaced by greedy search, then the temperature fallback is disabled, then the word
+            timestamps are disabled, and finally the windows are skipped when the no speech
+            probe is above `no_speech_threshold` (see `no_speech_probe_threshold`). The applied
+            degradations are listed in `TranscriptionInfo.degradations`.
+          cancel_event: A threading.Event to cancel the transcription from another thread. It is
+            checked before each window: once it is set, the segments generator stops and
+            releases the features and encoder outputs.
+          callback: A TranscriptionCallback receiving the window, encoding, decoding, segment
+            and batch events with their timing and size.
+          lazy_word_timestamps: If True and word_timestamps is True, the word timestamps of a
+            window are only computed when the `words` of one of its segments are first accessed.
+            The segments are then instances of LazySegment, and the word alignment does not
+            change the transcription: the segment timestamps are not refined, the next window
+            starts at the last timestamp token instead of the last word, the words of the next
+            window are aligned from the end of the last segment instead of the last word, and
+            hallucination_silence_threshold has no effect. The windows after the first one
+            can then be decoded differently than with eager word timestamps.
+          word_timestamps_memory_budget: Maximum size in MB of the encoder outputs kept for the
+            lazy word timestamps. When it is exceeded, the oldest encoder outputs are dropped and
+            their windows are encoded again when their words are accessed. None keeps all
+            encoder outputs.
+          streaming: Decode the audio, run the VAD and compute the features incrementally over
+            a buffer of a few windows, so that the memory usage does not depend on the audio
+            duration. The audio is decoded twice: a first pass measures its duration and runs
+            the VAD before the transcription starts, which doubles the decoding time. The
+            audio must be a path, a seekable file-like object or a waveform. The features of
+            each window are normalized on their own.
+          checkpoint_path: Path of a JSON file where the state of the transcription and the
+            segments generated so far are written between windows, at most every
+            `checkpoint_interval` seconds, and when the transcription ends or is cancelled.
+          checkpoint_interval: Minimum time in seconds between two checkpoints.
+          resume_from: Path of a checkpoint written by a transcription of the same audio with
+            the same options. The segments of the checkpoint are yielded first and the
+            transcription continues from the window following the checkpoint, with the same
+            output as an uninterrupted transcription. Checkpoints do not support lazy word
+            timestamps.
+          priority_scheduler: A PriorityScheduler sharing the model with other transcriptions.
+            The transcription waits for its turn before each window, so that the windows of
+            the higher priority classes run first.
+          priority: Priority class of the transcription in `priority_scheduler`. If not set,
+            the lowest class.
         Returns:
           A tuple with:
 
@@ -823,6 +2141,13 @@ class WhisperModel:
         """
         sampling_rate = self.feature_extractor.sampling_rate
 
+        if (
+            (checkpoint_path is not None or resume_from is not None)
+            and word_timestamps
+            and lazy_word_timestamps
+        ):
+            raise ValueError("Checkpoints do not support lazy word timestamps")
+
         if multilingual and not self.model.is_multilingual:
             self.logger.warning(
                 "The current model is English-only but the multilingual parameter is set to"
@@ -830,25 +2155,76 @@ class WhisperModel:
             )
             multilingual = False
 
-        if not isinstance(audio, np.ndarray):
-            audio = decode_audio(audio, sampling_rate=sampling_rate)
+        if parallel_fallback and self.model.num_workers < 2:
+            self.logger.warning(
+                "The fallback temperatures can only be decoded in parallel when the model has "
+                "num_workers >= 2; setting parallel_fallback to False instead."
+            )
+            parallel_fallback = False
 
-        duration = audio.shape[0] / sampling_rate
+        use_vad = clip_timestamps == "vad" or (vad_filter and clip_timestamps == "0")
+        if use_vad:
+            if vad_parameters is None:
+                vad_parameters = VadOptions()
+            elif isinstance(vad_parameters, dict):
+                vad_parameters = VadOptions(**vad_parameters)
+
+        if streaming:
+            num_samples, speech_chunks = self._scan_audio(
+                audio, vad_parameters if use_vad else None
+            )
+        else:
+            if not isinstance(audio, np.ndarray):
+                audio = decode_audio(audio, sampling_rate=sampling_rate)
+            num_samples = audio.shape[0]
+
+        duration = num_samples / sampling_rate
         duration_after_vad = duration
 
         self.logger.info(
             "Processing audio with duration %s", format_timestamp(duration)
         )
 
-        if vad_filter and clip_timestamps == "0":
-            if vad_parameters is None:
-                vad_parameters = VadOptions()
-            elif isinstance(vad_parameters, dict):
-                vad_parameters = VadOptions(**vad_parameters)
-            speech_chunks = get_speech_timestamps(audio, vad_parameters)
-            audio_chunks, chunks_metadata = collect_chunks(audio, speech_chunks)
-            audio = np.concatenate(audio_chunks, axis=0)
-            duration_after_vad = audio.shape[0] / sampling_rate
+        if use_vad:
+            if not streaming:
+                speech_chunks = get_speech_timestamps(audio, vad_parameters)
+
+            if clip_timestamps == "vad":
+                # Transcribe the speech chunks as clips of the original audio, so that the
+                # timestamps do not need to be restored. The neighbouring chunks are grouped
+                # in clips of up to one window so that each chunk does not take a window,
+                # but the long silences are left out of the clips.
+                clips = merge_segments(
+                    [dict(chunk) for chunk in speech_chunks],
+                    replace(
+                        vad_parameters,
+                        max_speech_duration_s=(
+                            chunk_length or self.feature_extractor.chunk_length
+                        ),
+                        max_merge_silence_s=min(
+                            vad_parameters.max_merge_silence_s, 2.0
+                        ),
+                    ),
+                    sampling_rate,
+                )
+                clip_timestamps = [
+                    timestamp / sampling_rate
+                    for clip in clips
+                    for timestamp in (clip["start"], clip["end"])
+                ] or [0, 0]
+                duration_after_vad = (
+                    sum(chunk["end"] - chunk["start"] for chunk in speech_chunks)
+                    / sampling_rate
+                )
+            elif streaming:
+                num_samples = sum(
+                    chunk["end"] - chunk["start"] for chunk in speech_chunks
+                )
+                duration_after_vad = num_samples / sampling_rate
+            else:
+                audio_chunks, chunks_metadata = collect_chunks(audio, speech_chunks)
+                audio = np.concatenate(audio_chunks, axis=0)
+                duration_after_vad = audio.shape[0] / sampling_rate
 
             self.logger.info(
                 "VAD filter removed %s of audio",
@@ -868,10 +2244,29 @@ class WhisperModel:
                     ),
                 )
 
+            if not isinstance(clip_timestamps, str):
+                # The speech chunks are already transcribed at their original position.
+                speech_chunks = None
+
         else:
             speech_chunks = None
 
-        features = self.feature_extractor(audio, chunk_length=chunk_length)
+        if streaming:
+            if chunk_length is not None:
+                self.feature_extractor.set_chunk_length(chunk_length)
+            audio_blocks = iterate_audio(audio, sampling_rate)
+            if speech_chunks is not None:
+                audio_blocks = iterate_chunks(audio_blocks, speech_chunks)
+            features = StreamingFeatures(
+                self.feature_extractor,
+                audio_blocks,
+                num_samples,
+                # Keeps the windows decoded together and the previous one.
+                history_frames=(window_batch_size + 1)
+                * self.feature_extractor.nb_max_frames,
+            )
+        else:
+            features = self.feature_extractor(audio, chunk_length=chunk_length)
 
         encoder_output = None
         all_language_probs = None
@@ -882,27 +2277,42 @@ class WhisperModel:
                 language = "en"
                 language_probability = 1
             else:
-                start_timestamp = (
-                    float(clip_timestamps.split(",")[0])
-                    if isinstance(clip_timestamps, str)
-                    else clip_timestamps[0]
-                )
                 content_frames = features.shape[-1] - 1
-                seek = (
-                    int(start_timestamp * self.frames_per_second)
-                    if start_timestamp * self.frames_per_second < content_frames
-                    else 0
-                )
+                seek_clips = self._get_seek_clips(clip_timestamps, content_frames)
+                seek, clip_end = seek_clips[0]
+                if seek >= content_frames:
+                    seek = 0
                 (
                     language,
                     language_probability,
                     all_language_probs,
-                ) = self.detect_language(
-                    features=features[..., seek:],
+                    encoder_outputs,
+                ) = self._detect_language(
+                    # Exclude the last frame like generate_segments does, so that the first
+                    # detection window can be reused for the transcription.
+                    features[
+                        ...,
+                        seek : (
+                            min(
+                                content_frames,
+                                seek
+                                + language_detection_segments
+                                * self.feature_extractor.nb_max_frames,
+                            )
+                            if content_frames > 0
+                            else None
+                        ),
+                    ],
                     language_detection_segments=language_detection_segments,
                     language_detection_threshold=language_detection_threshold,
                 )
 
+                window_end = min(
+                    seek + self.feature_extractor.nb_max_frames, content_frames
+                )
+                if seek_clips[0][0] == seek and seek < window_end <= clip_end:
+                    encoder_output = encoder_outputs[0]
+
                 self.logger.info(
                     "Detected language '%s' with probability %.2f",
                     language,
@@ -958,15 +2368,23 @@ class WhisperModel:
             clip_timestamps=clip_timestamps,
             hallucination_silence_threshold=hallucination_silence_threshold,
             hotwords=hotwords,
+            encode_ahead=encode_ahead,
+            window_batch_size=window_batch_size,
+            no_speech_probe_threshold=no_speech_probe_threshold,
+            repetition_abort_tokens=repetition_abort_tokens,
+            parallel_fallback=parallel_fallback,
+            adaptive_beam_log_prob_threshold=adaptive_beam_log_prob_threshold,
+            adaptive_beam_compression_ratio_threshold=(
+                adaptive_beam_compression_ratio_threshold
+            ),
+            time_budget=time_budget,
+            lazy_word_timestamps=lazy_word_timestamps,
+            word_timestamps_memory_budget=word_timestamps_memory_budget,
+            checkpoint_path=checkpoint_path,
+            checkpoint_interval=checkpoint_interval,
+            resume_from=resume_from,
         )
 
-        segments = self.generate_segments(
-            features, tokenizer, options, log_progress, encoder_output
-        )
-
-        if speech_chunks:
-            segments = restore_speech_timestamps(segments, speech_chunks, sampling_rate)
-
         info = TranscriptionInfo(
             language=language,
             language_probability=language_probability,
@@ -977,8 +2395,63 @@ class WhisperModel:
             all_language_probs=all_language_probs,
         )
 
+        turn = (
+            priority_scheduler._create_turn(priority)
+            if priority_scheduler is not None
+            else None
+        )
+        segments = self.generate_segments(
+            features,
+            tokenizer,
+            options,
+            log_progress,
+            encoder_output,
+            info,
+            cancel_event,
+            callback,
+            turn,
+        )
+        if turn is not None:
+            segments = release_turn_segments(segments, turn)
+
+        if speech_chunks:
+            segments = restore_speech_timestamps(segments, speech_chunks, sampling_rate)
+
         return segments, info
 
+    def _scan_audio(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        vad_options: Optional[VadOptions],
+    ) -> Tuple[int, Optional[List[dict]]]:
+        """Returns the number of samples of the audio and its speech chunks when VAD options
+        are given, without keeping the audio in memory.
+
+        Unless the audio is a waveform, it is decoded a first time for this scan, and a
+        second time when its features are computed.
+        """
+        sampling_rate = self.feature_extractor.sampling_rate
+        if vad_options is None:
+            if isinstance(audio, np.ndarray):
+                return audio.shape[0], None
+            return (
+                sum(block.shape[0] for block in iterate_audio(audio, sampling_rate)),
+                None,
+            )
+
+        num_samples = 0
+
+        def count_samples(audio_blocks):
+            nonlocal num_samples
+            for block in audio_blocks:
+                num_samples += block.shape[0]
+                yield block
+
+        speech_chunks = get_speech_timestamps(
+            count_samples(iterate_audio(audio, sampling_rate)), vad_options
+        )
+        return num_samples, speech_chunks
+
     def _split_segments_by_timestamps(
         self,
         tokenizer: Tokenizer,
@@ -1058,6 +2531,26 @@ class WhisperModel:
 
         return current_segments, seek, single_timestamp_ending
 
+    def _get_seek_clips(
+        self,
+        clip_timestamps: Union[str, List[float]],
+        content_frames: int,
+    ) -> List[Tuple[int, int]]:
+        if isinstance(clip_timestamps, str):
+            clip_timestamps = [
+                float(ts)
+                for ts in (clip_timestamps.split(",") if clip_timestamps else [])
+            ]
+
+        seek_points: List[int] = [
+            round(ts * self.frames_per_second) for ts in clip_timestamps
+        ]
+        if len(seek_points) == 0:
+            seek_points.append(0)
+        if len(seek_points) % 2 == 1:
+            seek_points.append(content_frames)
+        return list(zip(seek_points[::2], seek_points[1::2]))
+
     def generate_segments(
         self,
         features: np.ndarray,
@@ -1065,6 +2558,44 @@ class WhisperModel:
         options: TranscriptionOptions,
         log_progress,
         encoder_output: Optional[ctranslate2.StorageView] = None,
+        info: Optional[TranscriptionInfo] = None,
+        cancel_event: Optional[threading.Event] = None,
+        callback: Optional[TranscriptionCallback] = None,
+        turn: Optional["PriorityTurn"] = None,
+    ) -> Iterable[Segment]:
+        encode_executor = (
+            ThreadPoolExecutor(max_workers=1) if options.encode_ahead else None
+        )
+        try:
+            yield from self._generate_segments(
+                features,
+                tokenizer,
+                options,
+                log_progress,
+                encoder_output,
+                info,
+                cancel_event,
+                callback,
+                turn,
+                encode_executor,
+            )
+        finally:
+            if encode_executor is not None:
+                # The speculative encoding is not needed when the generator stops early.
+                encode_executor.shutdown(wait=False, cancel_futures=True)
+
+    def _generate_segments(
+        self,
+        features: np.ndarray,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        log_progress,
+        encoder_output: Optional[ctranslate2.StorageView],
+        info: Optional[TranscriptionInfo],
+        cancel_event: Optional[threading.Event],
+        callback: Optional[TranscriptionCallback],
+        turn: Optional["PriorityTurn"],
+        encode_executor: Optional[ThreadPoolExecutor],
     ) -> Iterable[Segment]:
         content_frames = features.shape[-1] - 1
         content_duration = float(content_frames * self.feature_extractor.time_per_frame)
@@ -1079,16 +2610,7 @@ class WhisperModel:
                 )
             ]
 
-        seek_points: List[int] = [
-            round(ts * self.frames_per_second) for ts in options.clip_timestamps
-        ]
-        if len(seek_points) == 0:
-            seek_points.append(0)
-        if len(seek_points) % 2 == 1:
-            seek_points.append(content_frames)
-        seek_clips: List[Tuple[int, int]] = list(
-            zip(seek_points[::2], seek_points[1::2])
-        )
+        seek_clips = self._get_seek_clips(options.clip_timestamps, content_frames)
 
         punctuation = "\"'“¿([{-\"'.。,，!！?？:：”)]}、"
 
@@ -1108,11 +2630,110 @@ class WhisperModel:
 
         pbar = tqdm(total=content_duration, unit="seconds", disable=not log_progress)
         last_speech_timestamp = 0.0
+        start_time = time.monotonic()
+        checkpoint_key = (
+            get_checkpoint_key([options], [tokenizer], content_frames)
+            if options.checkpoint_path is not None or options.resume_from is not None
+            else None
+        )
+        if options.time_budget is not None:
+            # Degrade a copy of the options so that the info keeps the requested ones.
+            options = replace(options)
+            clip_frames = sum(
+                max(min(end, content_frames) - start, 0) for start, end in seek_clips
+            )
+
+        checkpoint_segments = []
+        if options.resume_from is not None:
+            state = read_checkpoint(
+                options.resume_from, checkpoint_key, [info] if info is not None else []
+            )
+            seek = state["seek"]
+            clip_idx = state["clip_idx"]
+            idx = state["idx"]
+            all_tokens = state["all_tokens"]
+            prompt_reset_since = state["prompt_reset_since"]
+            last_speech_timestamp = state["last_speech_timestamp"]
+            start_time -= state["elapsed"]
+            for info_state in state["infos"]:
+                for degradation in info_state["degradations"]:
+                    apply_degradation(options, degradation)
+            # The encoder output of the caller is the one of the first window.
+            encoder_output = None
+            pbar.update(
+                min(seek, content_frames) * self.feature_extractor.time_per_frame
+            )
+
+            for segment in state["segments"]:
+                if options.checkpoint_path is not None:
+                    checkpoint_segments.append(segment)
+                yield segment_from_dict(segment)
+
+        def save_checkpoint():
+            write_checkpoint(
+                options.checkpoint_path,
+                checkpoint_key,
+                dict(
+                    seek=seek,
+                    clip_idx=clip_idx,
+                    idx=idx,
+                    all_tokens=all_tokens,
+                    prompt_reset_since=prompt_reset_since,
+                    last_speech_timestamp=last_speech_timestamp,
+                    elapsed=time.monotonic() - start_time,
+                    segments=checkpoint_segments,
+                ),
+                [info] if info is not None else [],
+            )
+
+        checkpoint_time = time.monotonic()
+        next_encoding = None
+        # The speculation stops when the next window mostly starts elsewhere, e.g. when the
+        # seek is advanced from the timestamp tokens.
+        encode_ahead_hits = 0
+        encode_ahead_misses = 0
+        # The encoder output of the first window can be provided by the caller.
+        first_encoder_output = encoder_output
+        # Without conditioning on the previous text, the windows only depend on each other
+        # through the seek, so consecutive windows can be decoded in a single batch. The
+        # repetition checks run on each decoding and are not batched.
+        window_batching = (
+            options.window_batch_size > 1
+            and not options.condition_on_previous_text
+            and not options.word_timestamps
+            and not options.multilingual
+            and options.repetition_abort_tokens is None
+        )
+        window_batch_size = options.window_batch_size
+        window_results = {}
+        next_window = None
+        lazy_words = (
+            LazyWordTimestamps(self, options)
+            if options.word_timestamps and options.lazy_word_timestamps
+            else None
+        )
         # NOTE: This loop is obscurely flattened to make the diff readable.
         # A later commit should turn this into a simpler nested loop.
         # for seek_clip_start, seek_clip_end in seek_clips:
         #     while seek < seek_clip_end
         while clip_idx < len(seek_clips):
+            if turn is not None:
+                turn.acquire()
+
+            if cancel_event is not None and cancel_event.is_set():
+                self.logger.info("Transcription cancelled")
+                break
+
+            if (
+                options.checkpoint_path is not None
+                and not window_results
+                and time.monotonic() - checkpoint_time >= options.checkpoint_interval
+            ):
+                # The results decoded ahead are not saved, so the checkpoint waits for the
+                # end of the window batch.
+                save_checkpoint()
+                checkpoint_time = time.monotonic()
+
             seek_clip_start, seek_clip_end = seek_clips[clip_idx]
             if seek_clip_end > content_frames:
                 seek_clip_end = content_frames
@@ -1123,6 +2744,16 @@ class WhisperModel:
                 if clip_idx < len(seek_clips):
                     seek = seek_clips[clip_idx][0]
                 continue
+
+            if options.time_budget is not None and clip_frames > 0:
+                processed_frames = sum(
+                    max(min(seek, end, content_frames) - start, 0)
+                    for start, end in seek_clips
+                )
+                self._apply_time_budget(
+                    options, info, start_time, processed_frames / clip_frames
+                )
+
             time_offset = seek * self.feature_extractor.time_per_frame
             window_end_time = float(
                 (seek + self.feature_extractor.nb_max_frames)
@@ -1137,6 +2768,10 @@ class WhisperModel:
             segment_duration = segment_size * self.feature_extractor.time_per_frame
             segment = pad_or_trim(segment)
 
+            window_start_time = time.monotonic()
+            if callback is not None:
+                callback.on_window_start(seek, segment_size)
+
             if self.logger.isEnabledFor(logging.DEBUG):
                 self.logger.debug(
                     "Processing segment at %s", format_timestamp(time_offset)
@@ -1144,8 +2779,61 @@ class WhisperModel:
 
             previous_tokens = all_tokens[prompt_reset_since:]
 
-            if seek > 0 or encoder_output is None:
+            if window_batching and next_window is not None:
+                # Grow the batches while the windows start where they are expected to.
+                if next_window[:2] == (seek, segment_size):
+                    window_batch_size = min(
+                        window_batch_size * 2, options.window_batch_size
+                    )
+                else:
+                    window_batch_size = max(window_batch_size // 2, 1)
+
+            if window_batching and first_encoder_output is None:
+                # The windows are encoded together with the decoding batch.
+                encoder_output = None
+            elif next_encoding is not None and next_encoding[:2] == (
+                seek,
+                segment_size,
+            ):
+                encoder_output = next_encoding[2].result()
+                encode_ahead_hits += 1
+            elif first_encoder_output is not None:
+                encoder_output = first_encoder_output
+            else:
+                if next_encoding is not None:
+                    next_encoding[2].cancel()
+                    encode_ahead_misses += 1
                 encoder_output = self.encode(segment)
+            next_encoding = None
+            first_encoder_output = None
+
+            if callback is not None and encoder_output is not None:
+                callback.on_encoded(1, time.monotonic() - window_start_time)
+
+            # Speculate that the next window starts where this one ends.
+            next_window = self._get_next_window(
+                seek + segment_size, clip_idx, seek_clips, content_frames
+            )
+
+            if (
+                encode_executor is not None
+                and encoder_output is not None
+                and next_window is not None
+                and (
+                    encode_ahead_misses < 4 or encode_ahead_misses <= encode_ahead_hits
+                )
+            ):
+                next_seek, next_segment_size, _ = next_window
+                next_encoding = (
+                    next_seek,
+                    next_segment_size,
+                    encode_executor.submit(
+                        self.encode,
+                        pad_or_trim(
+                            features[:, next_seek : next_seek + next_segment_size]
+                        ),
+                    ),
+                )
 
             if options.multilingual:
                 results = self.model.detect_language(encoder_output)
@@ -1163,12 +2851,72 @@ class WhisperModel:
                 hotwords=options.hotwords,
             )
 
-            (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
-            ) = self.generate_with_fallback(encoder_output, prompt, tokenizer, options)
+            no_speech_prob = None
+            decode_result = None
+            if encoder_output is None:
+                window_result = window_results.pop((seek, segment_size), None)
+                if window_result is None or window_result[0] != prompt:
+                    window_results = self._generate_windows(
+                        features,
+                        seek,
+                        clip_idx,
+                        seek_clips,
+                        prompt,
+                        tokenizer,
+                        options,
+                        window_batch_size,
+                        info,
+                        callback,
+                    )
+                    window_result = window_results.pop((seek, segment_size))
+                _, no_speech_prob, decode_result = window_result
+            elif options.no_speech_probe_threshold is not None:
+                no_speech_prob = self._probe_no_speech(encoder_output, [prompt])[0]
+
+            if (
+                no_speech_prob is not None
+                and no_speech_prob > options.no_speech_probe_threshold
+            ):
+                self.logger.debug(
+                    "No speech probe threshold is met (%f > %f)",
+                    no_speech_prob,
+                    options.no_speech_probe_threshold,
+                )
+                if info is not None:
+                    info.no_speech_probe_skips += 1
+                if callback is not None:
+                    callback.on_batch_done(1, 0, time.monotonic() - window_start_time)
+
+                seek += segment_size
+                continue
+
+            decode_start_time = time.monotonic()
+            if decode_result is None:
+                decode_result = self.generate_with_fallback(
+                    encoder_output, prompt, tokenizer, options, info=info
+                )
+            elif self._needs_fallback(decode_result, options):
+                encoder_output = self.encode(segment)
+                decode_result = self.generate_with_fallback(
+                    encoder_output,
+                    prompt,
+                    tokenizer,
+                    options,
+                    first_result=decode_result[0],
+                    info=info,
+                )
+            else:
+                # The window was decoded in the batch.
+                decode_start_time = None
+
+            result, avg_logprob, temperature, compression_ratio = decode_result
+
+            if callback is not None and decode_start_time is not None:
+                callback.on_decoded(
+                    1,
+                    len(result.sequences_ids[0]),
+                    time.monotonic() - decode_start_time,
+                )
 
             if options.no_speech_threshold is not None:
                 # no voice activity check
@@ -1188,6 +2936,11 @@ class WhisperModel:
                         options.no_speech_threshold,
                     )
 
+                    if callback is not None:
+                        callback.on_batch_done(
+                            1, 0, time.monotonic() - window_start_time
+                        )
+
                     # fast-forward to the next segment boundary
                     seek += segment_size
                     continue
@@ -1233,7 +2986,19 @@ class WhisperModel:
                 seek=seek,
             )
 
-            if options.word_timestamps:
+            window_idx = None
+            if options.word_timestamps and lazy_words is not None:
+                window_idx = lazy_words.add_window(
+                    features[:, previous_seek : previous_seek + segment_size],
+                    segment_size,
+                    current_segments,
+                    tokenizer,
+                    encoder_output,
+                    last_speech_timestamp,
+                )
+                if current_segments:
+                    last_speech_timestamp = current_segments[-1]["end"]
+            elif options.word_timestamps:
                 self.add_word_timestamps(
                     [current_segments],
                     tokenizer,
@@ -1258,6 +3023,10 @@ class WhisperModel:
                         gap = first_segment["start"] - time_offset
                         if gap > threshold:
                             seek = previous_seek + round(gap * self.frames_per_second)
+                            if callback is not None:
+                                callback.on_batch_done(
+                                    1, 0, time.monotonic() - window_start_time
+                                )
                             continue
 
                     # skip silence before any possible hallucination that is surrounded
@@ -1299,7 +3068,10 @@ class WhisperModel:
                 last_word_end = get_end(current_segments)
                 if last_word_end is not None:
                     last_speech_timestamp = last_word_end
-            for segment in current_segments:
+
+            window_elapsed = time.monotonic() - window_start_time
+            num_segments = 0
+            for segment_idx, segment in enumerate(current_segments):
                 tokens = segment["tokens"]
                 text = tokenizer.decode(tokens)
 
@@ -1308,8 +3080,19 @@ class WhisperModel:
 
                 all_tokens.extend(tokens)
                 idx += 1
+                num_segments += 1
 
-                yield Segment(
+                if window_idx is not None:
+                    segment_class = LazySegment
+                    words = lazy_words.get_lazy_words(window_idx, segment_idx)
+                else:
+                    segment_class = Segment
+                    words = (
+                        [Word(**word) for word in segment["words"]]
+                        if options.word_timestamps
+                        else None
+                    )
+                segment = segment_class(
                     id=idx,
                     seek=previous_seek,
                     start=segment["start"],
@@ -1320,12 +3103,16 @@ class WhisperModel:
                     avg_logprob=avg_logprob,
                     compression_ratio=compression_ratio,
                     no_speech_prob=result.no_speech_prob,
-                    words=(
-                        [Word(**word) for word in segment["words"]]
-                        if options.word_timestamps
-                        else None
-                    ),
+                    words=words,
                 )
+                if options.checkpoint_path is not None:
+                    checkpoint_segments.append(asdict(segment))
+                if callback is not None:
+                    callback.on_segment(segment)
+                yield segment
+
+            if callback is not None:
+                callback.on_batch_done(1, num_segments, window_elapsed)
 
             if (
                 not options.condition_on_previous_text
@@ -1346,6 +3133,214 @@ class WhisperModel:
             )
         pbar.close()
 
+        if options.checkpoint_path is not None:
+            save_checkpoint()
+
+    def _apply_time_budget(
+        self,
+        options: TranscriptionOptions,
+        info: Optional[TranscriptionInfo],
+        start_time: float,
+        progress: float,
+        skip_low_speech: bool = True,
+    ) -> None:
+        """Degrades the options by one step when the time budget is at risk.
+
+        The total time is projected from the elapsed time and the progress, as a fraction
+        of the audio to transcribe.
+        """
+        elapsed = time.monotonic() - start_time
+        if progress <= 0 or elapsed / progress <= options.time_budget:
+            return
+
+        if options.beam_size > 1:
+            degradation = "beam_size"
+        elif len(options.temperatures) > 1:
+            degradation = "temperature_fallback"
+        elif options.word_timestamps:
+            degradation = "word_timestamps"
+        elif (
+            skip_low_speech
+            and options.no_speech_probe_threshold is None
+            and options.no_speech_threshold is not None
+        ):
+            degradation = "no_speech_probe"
+        else:
+            return
+        apply_degradation(options, degradation)
+
+        self.logger.info(
+            "Time budget of %.1fs is at risk (%.1fs projected), applying degradation '%s'",
+            options.time_budget,
+            elapsed / progress,
+            degradation,
+        )
+        if info is not None:
+            info.degradations.append(degradation)
+
+    def _get_next_window(
+        self,
+        seek: int,
+        clip_idx: int,
+        seek_clips: List[Tuple[int, int]],
+        content_frames: int,
+    ) -> Optional[Tuple[int, int, int]]:
+        """Returns the seek, size and clip index of the window processed from this seek."""
+        while clip_idx < len(seek_clips):
+            seek_clip_start, seek_clip_end = seek_clips[clip_idx]
+            seek_clip_end = min(seek_clip_end, content_frames)
+            seek = max(seek, seek_clip_start)
+            if seek < seek_clip_end:
+                segment_size = min(
+                    self.feature_extractor.nb_max_frames, seek_clip_end - seek
+                )
+                return seek, segment_size, clip_idx
+            clip_idx += 1
+            if clip_idx < len(seek_clips):
+                seek = seek_clips[clip_idx][0]
+        return None
+
+    def _generate_windows(
+        self,
+        features: np.ndarray,
+        seek: int,
+        clip_idx: int,
+        seek_clips: List[Tuple[int, int]],
+        prompt: List[int],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        batch_size: int,
+        info: Optional[TranscriptionInfo] = None,
+        callback: Optional[TranscriptionCallback] = None,
+    ) -> Dict[Tuple[int, int], Tuple[List[int], Optional[float], Optional[tuple]]]:
+        """Decodes the window at this seek and the following windows in a single batch.
+
+        Each following window is assumed to start where the previous one ends. The results
+        are keyed by window seek and size, and include the prompt used for the window and
+        the no speech probability of the probe. The decoding result is None for the windows
+        skipped by the probe.
+        """
+        content_frames = features.shape[-1] - 1
+        windows = [self._get_next_window(seek, clip_idx, seek_clips, content_frames)]
+        prompts = [prompt]
+
+        # The prompt of the following windows no longer includes the initial prompt.
+        next_prompt = self.get_prompt(
+            tokenizer,
+            [],
+            without_timestamps=options.without_timestamps,
+            hotwords=options.hotwords,
+        )
+        # All prompts of a batch must have the same length.
+        if len(next_prompt) == len(prompt):
+            while len(windows) < batch_size:
+                window_seek, segment_size, window_clip_idx = windows[-1]
+                window = self._get_next_window(
+                    window_seek + segment_size,
+                    window_clip_idx,
+                    seek_clips,
+                    content_frames,
+                )
+                if window is None:
+                    break
+                windows.append(window)
+                prompts.append(next_prompt)
+
+        self.logger.debug("Decoding %d windows in a batch", len(windows))
+
+        segments = np.stack(
+            [
+                pad_or_trim(features[:, window_seek : window_seek + segment_size])
+                for window_seek, segment_size, _ in windows
+            ]
+        )
+        encode_start_time = time.monotonic()
+        encoder_output = self.encode(segments)
+        if callback is not None:
+            callback.on_encoded(len(windows), time.monotonic() - encode_start_time)
+
+        decode_start_time = time.monotonic()
+        if options.no_speech_probe_threshold is not None:
+            no_speech_probs = self._probe_no_speech(encoder_output, prompts)
+        else:
+            no_speech_probs = [None] * len(windows)
+
+        # Only decode the windows that are not skipped by the no speech probe.
+        indices = [
+            i
+            for i, no_speech_prob in enumerate(no_speech_probs)
+            if no_speech_prob is None
+            or no_speech_prob <= options.no_speech_probe_threshold
+        ]
+        decode_results = [None] * len(windows)
+        if indices:
+            if len(indices) < len(windows):
+                encoder_output = self._select_encoder_output(encoder_output, indices)
+            results = self._generate(
+                encoder_output,
+                [prompts[i] for i in indices],
+                options.temperatures[0],
+                tokenizer,
+                options,
+                info=info,
+            )
+            for i, result in zip(indices, results):
+                decode_results[i] = self._get_decode_result(
+                    result, options.temperatures[0], tokenizer, options
+                )
+            if callback is not None:
+                callback.on_decoded(
+                    len(indices),
+                    sum(len(result.sequences_ids[0]) for result in results),
+                    time.monotonic() - decode_start_time,
+                )
+
+        return {
+            window[:2]: (window_prompt, no_speech_prob, decode_result)
+            for window, window_prompt, no_speech_prob, decode_result in zip(
+                windows, prompts, no_speech_probs, decode_results
+            )
+        }
+
+    def _select_encoder_output(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        indices: List[int],
+    ) -> ctranslate2.StorageView:
+        """Selects batch entries of an encoder output."""
+        if encoder_output.device != "cpu":
+            encoder_output = encoder_output.to_device(ctranslate2.Device.cpu)
+        return get_ctranslate2_storage(np.asarray(encoder_output)[indices])
+
+    def _is_repetition_loop(
+        self,
+        tokens: List[int],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+    ) -> bool:
+        """Checks whether partially decoded tokens are stuck in a repetition loop."""
+        if options.compression_ratio_threshold is not None:
+            text = tokenizer.decode(tokens).strip()
+            if get_compression_ratio(text) > options.compression_ratio_threshold:
+                return True
+
+        return has_repeated_ngram_suffix(tokens)
+
+    def _probe_no_speech(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompts: List[List[int]],
+    ) -> List[float]:
+        """Returns the no speech probabilities from the first decoding step only."""
+        results = self.model.generate(
+            encoder_output,
+            prompts,
+            beam_size=1,
+            max_length=len(prompts[0]) + 1,
+            return_no_speech_prob=True,
+        )
+        return [result.no_speech_prob for result in results]
+
     def encode(self, features: np.ndarray) -> ctranslate2.StorageView:
         # When the model is running on multiple GPUs, the encoder output should be moved
         # to the CPU since we don't know which GPU will handle the next job.
@@ -1363,16 +3358,180 @@ class WhisperModel:
         prompt: List[int],
         tokenizer: Tokenizer,
         options: TranscriptionOptions,
+        first_result: Optional[ctranslate2.models.WhisperGenerationResult] = None,
+        info: Optional[TranscriptionInfo] = None,
     ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
         decode_result = None
         all_results = []
         below_cr_threshold_results = []
 
+        abort_tokens = options.repetition_abort_tokens
+        if abort_tokens is not None and (
+            len(prompt) + abort_tokens >= self.max_length
+            or (
+                options.max_new_tokens is not None
+                and options.max_new_tokens <= abort_tokens
+            )
+        ):
+            abort_tokens = None
+
+        parallel_results = {}
+        parallel_temperatures = iter(range(1, len(options.temperatures)))
+
+        for i, temperature in enumerate(options.temperatures):
+            is_repetition_loop = False
+            cum_logprob = None
+
+            if i == 0 and first_result is not None:
+                result = first_result
+            elif i in parallel_results:
+                result = parallel_results.pop(i).result()
+            elif abort_tokens is not None:
+                (
+                    result,
+                    cum_logprob,
+                    is_repetition_loop,
+                ) = self._generate_with_repetition_abort(
+                    encoder_output,
+                    prompt,
+                    temperature,
+                    tokenizer,
+                    options,
+                    abort_tokens,
+                    info=info,
+                )
+            else:
+                result = self._generate(
+                    encoder_output, [prompt], temperature, tokenizer, options, info=info
+                )[0]
+
+            decode_result = self._get_decode_result(
+                result, temperature, tokenizer, options, cum_logprob=cum_logprob
+            )
+            all_results.append(decode_result)
+
+            if (
+                options.compression_ratio_threshold is not None
+                and decode_result[3] <= options.compression_ratio_threshold
+                and not is_repetition_loop
+            ):
+                below_cr_threshold_results.append(decode_result)
+
+            if not self._needs_fallback(decode_result, options, is_repetition_loop):
+                break
+
+            if options.parallel_fallback:
+                # Decode the next temperatures concurrently, one per worker of the model.
+                # The decodings still running when a result is accepted are not cancelled.
+                for j in itertools.islice(
+                    parallel_temperatures,
+                    self.model.num_workers - len(parallel_results),
+                ):
+                    parallel_results[j] = self._generate(
+                        encoder_output,
+                        [prompt],
+                        options.temperatures[j],
+                        tokenizer,
+                        options,
+                        asynchronous=True,
+                    )[0]
+        else:
+            # all failed, select the result with the highest average log probability
+            decode_result = max(
+                below_cr_threshold_results or all_results, key=lambda x: x[1]
+            )
+            # to pass final temperature for prompt_reset_on_temperature
+            decode_result = (
+                decode_result[0],
+                decode_result[1],
+                temperature,
+                decode_result[3],
+            )
+
+        return decode_result
+
+    def _generate_with_repetition_abort(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompt: List[int],
+        temperature: float,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        abort_tokens: int,
+        info: Optional[TranscriptionInfo] = None,
+    ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, bool]:
+        """Decodes the prompt by steps of `abort_tokens` tokens and stops as soon as the
+        tokens are stuck in a repetition loop.
+
+        Without timestamps, each step continues from the tokens checked at the previous
+        step, which are passed back as a prefix of the prompt. With timestamps, the decoding
+        restarts from the prompt with a higher limit since ctranslate2 forces a timestamp
+        right after a prefix.
+
+        Returns:
+          A tuple with the generation result, the cumulative log probability of its tokens,
+          and whether the tokens are stuck in a repetition loop.
+        """
+        if options.max_new_tokens is not None:
+            max_length = len(prompt) + options.max_new_tokens
+        else:
+            max_length = self.max_length
+
+        tokens = []
+        prefix_cum_logprob = 0.0
+
+        while True:
+            # ctranslate2 generates at most max_length // 2 tokens, including the prefix,
+            # and at most max_length - len(prompt) + 1 tokens.
+            num_tokens = len(tokens) + abort_tokens
+            length = min(max(2 * num_tokens, len(prompt) + num_tokens - 1), max_length)
+            prefix = tokens if options.without_timestamps else []
+            result = self._generate(
+                encoder_output,
+                [prompt + prefix],
+                temperature,
+                tokenizer,
+                options,
+                max_new_tokens=max(length - len(prompt) - len(prefix), 1),
+                info=info,
+            )[0]
+
+            # The returned tokens include the prefix, but the score only includes the log
+            # probabilities of the new tokens normalized by the length of all tokens.
+            seq_len = len(result.sequences_ids[0])
+            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+            if prefix:
+                cum_logprob += prefix_cum_logprob
+
+            # The decoding ended when the higher limit did not produce more tokens.
+            if seq_len <= len(tokens) or length == max_length:
+                return result, cum_logprob, False
+
+            tokens = result.sequences_ids[0]
+            prefix_cum_logprob = cum_logprob
+            if self._is_repetition_loop(tokens, tokenizer, options):
+                return result, cum_logprob, True
+
+    def _generate(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompts: List[List[int]],
+        temperature: float,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        max_new_tokens: Optional[int] = None,
+        asynchronous: bool = False,
+        info: Optional[TranscriptionInfo] = None,
+    ) -> List[ctranslate2.models.WhisperGenerationResult]:
         max_initial_timestamp_index = int(
             round(options.max_initial_timestamp / self.time_precision)
         )
-        if options.max_new_tokens is not None:
-            max_length = len(prompt) + options.max_new_tokens
+        if max_new_tokens is None:
+            max_new_tokens = options.max_new_tokens
+
+        prompt = prompts[0]
+        if max_new_tokens is not None:
+            max_length = len(prompt) + max_new_tokens
         else:
             max_length = self.max_length
 
@@ -1387,105 +3546,177 @@ class WhisperModel:
                 f"so that their combined length is less that {self.max_length}."
             )
 
-        for temperature in options.temperatures:
-            if temperature > 0:
-                kwargs = {
-                    "beam_size": 1,
-                    "num_hypotheses": options.best_of,
-                    "sampling_topk": 0,
-                    "sampling_temperature": temperature,
-                }
-            else:
-                kwargs = {
-                    "beam_size": options.beam_size,
-                    "patience": options.patience,
-                }
+        kwargs = dict(
+            length_penalty=options.length_penalty,
+            repetition_penalty=options.repetition_penalty,
+            no_repeat_ngram_size=options.no_repeat_ngram_size,
+            max_length=max_length,
+            return_scores=True,
+            return_no_speech_prob=True,
+            suppress_blank=options.suppress_blank,
+            suppress_tokens=options.suppress_tokens,
+            max_initial_timestamp_index=max_initial_timestamp_index,
+            **self._get_temperature_kwargs(temperature, options),
+        )
 
-            result = self.model.generate(
-                encoder_output,
-                [prompt],
-                length_penalty=options.length_penalty,
-                repetition_penalty=options.repetition_penalty,
-                no_repeat_ngram_size=options.no_repeat_ngram_size,
-                max_length=max_length,
-                return_scores=True,
-                return_no_speech_prob=True,
-                suppress_blank=options.suppress_blank,
-                suppress_tokens=options.suppress_tokens,
-                max_initial_timestamp_index=max_initial_timestamp_index,
-                **kwargs,
-            )[0]
+        if asynchronous:
+            return self.model.generate(
+                encoder_output, prompts, asynchronous=True, **kwargs
+            )
 
-            tokens = result.sequences_ids[0]
+        return self._generate_with_adaptive_beam(
+            encoder_output, prompts, tokenizer, options, info, **kwargs
+        )
 
-            # Recover the average log prob from the returned score.
-            seq_len = len(tokens)
-            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
-            avg_logprob = cum_logprob / (seq_len + 1)
+    def _generate_with_adaptive_beam(
+        self,
+        encoder_output: ctranslate2.StorageView,
+        prompts: List[List[int]],
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        info: Optional[TranscriptionInfo] = None,
+        **kwargs,
+    ) -> List[ctranslate2.models.WhisperGenerationResult]:
+        """Runs the beam search only for the prompts whose greedy decoding is not confident.
 
-            text = tokenizer.decode(tokens).strip()
-            compression_ratio = get_compression_ratio(text)
+        The adaptive beam is only enabled when one of its thresholds is set, otherwise the
+        prompts are directly decoded with the generation arguments.
+        """
+        if kwargs.get("beam_size", 1) == 1 or (
+            options.adaptive_beam_log_prob_threshold is None
+            and options.adaptive_beam_compression_ratio_threshold is None
+        ):
+            return self.model.generate(encoder_output, prompts, **kwargs)
+
+        results = self.model.generate(
+            encoder_output, prompts, **{**kwargs, "beam_size": 1}
+        )
 
-            decode_result = (
-                result,
-                avg_logprob,
-                temperature,
-                compression_ratio,
+        escalated = []
+        for i, result in enumerate(results):
+            _, avg_logprob, _, compression_ratio = self._get_decode_result(
+                result, 0, tokenizer, options
             )
-            all_results.append(decode_result)
+            if (
+                options.adaptive_beam_log_prob_threshold is not None
+                and avg_logprob < options.adaptive_beam_log_prob_threshold
+            ) or (
+                options.adaptive_beam_compression_ratio_threshold is not None
+                and compression_ratio
+                > options.adaptive_beam_compression_ratio_threshold
+            ):
+                escalated.append(i)
 
-            needs_fallback = False
+        if info is not None:
+            info.adaptive_beam_greedy_decodes += len(results)
+            info.adaptive_beam_escalations += len(escalated)
 
-            if options.compression_ratio_threshold is not None:
-                if compression_ratio > options.compression_ratio_threshold:
-                    needs_fallback = True  # too repetitive
+        if escalated:
+            self.logger.debug(
+                "Running the beam search for %d of %d greedy decodings",
+                len(escalated),
+                len(results),
+            )
+            if len(escalated) < len(results):
+                encoder_output = self._select_encoder_output(encoder_output, escalated)
+            beam_results = self.model.generate(
+                encoder_output, [prompts[i] for i in escalated], **kwargs
+            )
+            for i, result in zip(escalated, beam_results):
+                results[i] = result
+
+        return results
+
+    def _get_temperature_kwargs(
+        self, temperature: float, options: TranscriptionOptions
+    ) -> dict:
+        if temperature > 0:
+            return {
+                "beam_size": 1,
+                "num_hypotheses": options.best_of,
+                "sampling_topk": 0,
+                "sampling_temperature": temperature,
+            }
+        else:
+            return {
+                "beam_size": options.beam_size,
+                "patience": options.patience,
+            }
 
-                    self.logger.debug(
-                        "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
-                        temperature,
-                        compression_ratio,
-                        options.compression_ratio_threshold,
-                    )
-                else:
-                    below_cr_threshold_results.append(decode_result)
+    def _get_decode_result(
+        self,
+        result: ctranslate2.models.WhisperGenerationResult,
+        temperature: float,
+        tokenizer: Tokenizer,
+        options: TranscriptionOptions,
+        cum_logprob: Optional[float] = None,
+    ) -> Tuple[ctranslate2.models.WhisperGenerationResult, float, float, float]:
+        tokens = result.sequences_ids[0]
 
-            if (
-                options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
-            ):
-                needs_fallback = True  # average log probability is too low
+        # Recover the average log prob from the returned score, unless the cumulative log
+        # prob is given for a result continued from a prefix.
+        seq_len = len(tokens)
+        if cum_logprob is None:
+            cum_logprob = result.scores[0] * (seq_len**options.length_penalty)
+        avg_logprob = cum_logprob / (seq_len + 1)
+
+        text = tokenizer.decode(tokens).strip()
+        compression_ratio = get_compression_ratio(text)
+
+        return result, avg_logprob, temperature, compression_ratio
+
+    def _needs_fallback(
+        self,
+        decode_result: Tuple[
+            ctranslate2.models.WhisperGenerationResult, float, float, float
+        ],
+        options: TranscriptionOptions,
+        is_repetition_loop: bool = False,
+    ) -> bool:
+        result, avg_logprob, temperature, compression_ratio = decode_result
+        needs_fallback = False
+
+        if is_repetition_loop:
+            needs_fallback = True  # the decoding was aborted
+
+            self.logger.debug(
+                "Repetition loop detected with temperature %.1f, aborted the decoding",
+                temperature,
+            )
+
+        if options.compression_ratio_threshold is not None:
+            if compression_ratio > options.compression_ratio_threshold:
+                needs_fallback = True  # too repetitive
 
                 self.logger.debug(
-                    "Log probability threshold is not met with temperature %.1f (%f < %f)",
+                    "Compression ratio threshold is not met with temperature %.1f (%f > %f)",
                     temperature,
-                    avg_logprob,
-                    options.log_prob_threshold,
+                    compression_ratio,
+                    options.compression_ratio_threshold,
                 )
 
-            if (
-                options.no_speech_threshold is not None
-                and result.no_speech_prob > options.no_speech_threshold
-                and options.log_prob_threshold is not None
-                and avg_logprob < options.log_prob_threshold
-            ):
-                needs_fallback = False  # silence
+        if (
+            options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = True  # average log probability is too low
 
-            if not needs_fallback:
-                break
-        else:
-            # all failed, select the result with the highest average log probability
-            decode_result = max(
-                below_cr_threshold_results or all_results, key=lambda x: x[1]
-            )
-            # to pass final temperature for prompt_reset_on_temperature
-            decode_result = (
-                decode_result[0],
-                decode_result[1],
+            self.logger.debug(
+                "Log probability threshold is not met with temperature %.1f (%f < %f)",
                 temperature,
-                decode_result[3],
+                avg_logprob,
+                options.log_prob_threshold,
             )
 
-        return decode_result
+        if (
+            options.no_speech_threshold is not None
+            and result.no_speech_prob > options.no_speech_threshold
+            and options.log_prob_threshold is not None
+            and avg_logprob < options.log_prob_threshold
+        ):
+            needs_fallback = False  # silence
+
+        return needs_fallback
 
     def get_prompt(
         self,
@@ -1768,15 +3999,236 @@ class WhisperModel:
             ]
             features = self.feature_extractor(audio)
 
+        language, language_probability, all_language_probs, _ = self._detect_language(
+            features, language_detection_segments, language_detection_threshold
+        )
+        return language, language_probability, all_language_probs
+
+    async def transcribe_async(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        executor: Optional[Executor] = None,
+        max_queue_size: int = 8,
+        **kwargs,
+    ) -> Tuple[AsyncIterator[Segment], TranscriptionInfo]:
+        """Transcribes an input file without blocking the event loop.
+
+        The audio decoding, VAD, feature extraction and language detection run in the
+        executor, then the segments are generated by a task of the executor and passed to
+        the event loop through a bounded queue. Cancelling the task iterating the segments,
+        or closing the iterator, cancels the transcription before the next window.
+
+        Arguments:
+          audio: Path to the input file (or a file-like object), or the audio waveform.
+          executor: Executor running the transcription. If not set, the default executor of
+            the event loop is used.
+          max_queue_size: Maximum number of segments generated ahead of the consumer.
+          kwargs: Other arguments of `transcribe`.
+
+        Returns:
+          A tuple with:
+
+            - an asynchronous iterator over transcribed segments
+            - an instance of TranscriptionInfo
+        """
+        loop = asyncio.get_running_loop()
+        cancel_event = kwargs.pop("cancel_event", None) or threading.Event()
+
+        segments, info = await loop.run_in_executor(
+            executor,
+            lambda: self.transcribe(audio, cancel_event=cancel_event, **kwargs),
+        )
+
+        return (
+            iterate_in_executor(segments, executor, max_queue_size, cancel_event),
+            info,
+        )
+
+    async def detect_language_async(
+        self,
+        audio: Optional[np.ndarray] = None,
+        features: Optional[np.ndarray] = None,
+        executor: Optional[Executor] = None,
+        **kwargs,
+    ) -> Tuple[str, float, List[Tuple[str, float]]]:
+        """Detects the language without blocking the event loop.
+
+        Arguments:
+          audio: Input audio signal, must be a 1D float array sampled at 16khz.
+          features: Input Mel spectrogram features.
+          executor: Executor running the detection. If not set, the default executor of
+            the event loop is used.
+          kwargs: Other arguments of `detect_language`.
+
+        Returns:
+          The same values as `detect_language`.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            lambda: self.detect_language(audio=audio, features=features, **kwargs),
+        )
+
+    def transcribe_sharded(
+        self,
+        audio: Union[str, BinaryIO, np.ndarray],
+        num_shards: Optional[int] = None,
+        **kwargs,
+    ) -> Tuple[Iterable[Segment], TranscriptionInfo]:
+        """Transcribes a long input file in shards processed in parallel.
+
+        The audio is split at the middle of the VAD silences closest to shards of equal
+        duration, and the shards are transcribed concurrently by the workers of the model.
+        On CPU, a model created with `num_workers=K` and `cpu_threads=N // K` uses N cores
+        for K shards. The text is not conditioned on the previous shard.
+
+        Arguments:
+          audio: Path to the input file (or a file-like object), or the audio waveform.
+          num_shards: Number of shards. If not set, the number of workers of the model.
+          kwargs: Other arguments of `transcribe`, except `clip_timestamps` and the
+            checkpoint arguments. The callback receives the events from the threads of the
+            shards.
+
+        Returns:
+          A tuple with:
+
+            - a generator over transcribed segments, in order and with their ids and
+              timestamps in the whole audio
+            - an instance of TranscriptionInfo, whose counters are updated when the segments
+              of a shard are yielded
+        """
+        for name in ("clip_timestamps", "checkpoint_path", "resume_from"):
+            if kwargs.get(name) is not None:
+                raise ValueError("Sharded transcriptions do not support %s" % name)
+
+        sampling_rate = self.feature_extractor.sampling_rate
+        if not isinstance(audio, np.ndarray):
+            audio = decode_audio(audio, sampling_rate=sampling_rate)
+
+        vad_parameters = kwargs.get("vad_parameters")
+        if vad_parameters is None:
+            vad_parameters = VadOptions()
+        elif isinstance(vad_parameters, dict):
+            vad_parameters = VadOptions(**vad_parameters)
+        shards = get_shard_bounds(
+            get_speech_timestamps(audio, vad_parameters),
+            audio.shape[0],
+            num_shards or self.model.num_workers,
+        )
+        self.logger.info("Transcribing the audio in %d shards", len(shards))
+
+        language_detection = None
+        if kwargs.get("language") is None and self.model.is_multilingual:
+            # Detect the language once so that all shards use the same one.
+            language_detection = self.detect_language(
+                audio,
+                vad_filter=kwargs.get("vad_filter", False),
+                vad_parameters=vad_parameters,
+                language_detection_segments=kwargs.get(
+                    "language_detection_segments", 1
+                ),
+                language_detection_threshold=kwargs.get(
+                    "language_detection_threshold", 0.5
+                ),
+            )
+            kwargs["language"] = language_detection[0]
+
+        cancel_event = kwargs.pop("cancel_event", None) or threading.Event()
+        executor = ThreadPoolExecutor(max_workers=len(shards))
+        shard_results = [
+            future.result()
+            for future in [
+                executor.submit(
+                    self.transcribe,
+                    audio[start:end],
+                    cancel_event=cancel_event,
+                    **kwargs,
+                )
+                for start, end in shards
+            ]
+        ]
+        segment_futures = [
+            executor.submit(list, shard_segments) for shard_segments, _ in shard_results
+        ]
+        executor.shutdown(wait=False)
+
+        shard_infos = [shard_info for _, shard_info in shard_results]
+        info = replace(
+            shard_infos[0],
+            duration=audio.shape[0] / sampling_rate,
+            duration_after_vad=sum(
+                shard_info.duration_after_vad for shard_info in shard_infos
+            ),
+            no_speech_probe_skips=0,
+            adaptive_beam_greedy_decodes=0,
+            adaptive_beam_escalations=0,
+            degradations=[],
+        )
+        if language_detection is not None:
+            (
+                info.language,
+                info.language_probability,
+                info.all_language_probs,
+            ) = language_detection
+
+        segments = self._generate_sharded_segments(
+            shards, segment_futures, shard_infos, info, cancel_event
+        )
+        return segments, info
+
+    def _generate_sharded_segments(
+        self,
+        shards: List[Tuple[int, int]],
+        segment_futures: List[Future],
+        shard_infos: List[TranscriptionInfo],
+        info: TranscriptionInfo,
+        cancel_event: threading.Event,
+    ) -> Iterable[Segment]:
+        sampling_rate = self.feature_extractor.sampling_rate
+        idx = 0
+        completed = False
+
+        try:
+            for (start, end), future, shard_info in zip(
+                shards, segment_futures, shard_infos
+            ):
+                # The shard is a speech chunk of the audio for the timestamps restoration.
+                for segment in restore_speech_timestamps(
+                    future.result(), [{"start": start, "end": end}], sampling_rate
+                ):
+                    idx += 1
+                    segment.id = idx
+                    segment.seek += start // self.feature_extractor.hop_length
+                    yield segment
+
+                for name in _INFO_COUNTER_FIELDS:
+                    setattr(info, name, getattr(info, name) + getattr(shard_info, name))
+
+            completed = True
+        finally:
+            if not completed:
+                # Stop the other shards when the generator is closed or a shard failed.
+                cancel_event.set()
+
+    def _detect_language(
+        self,
+        features: np.ndarray,
+        language_detection_segments: int = 1,
+        language_detection_threshold: float = 0.5,
+    ) -> Tuple[str, float, List[Tuple[str, float]], Dict[int, ctranslate2.StorageView]]:
+        """Detects the language from the features and also returns the encoder outputs of
+        the detection windows, indexed by their first frame."""
         features = features[
             ..., : language_detection_segments * self.feature_extractor.nb_max_frames
         ]
 
         detected_language_info = {}
+        encoder_outputs = {}
         for i in range(0, features.shape[-1], self.feature_extractor.nb_max_frames):
             encoder_output = self.encode(
                 pad_or_trim(features[..., i : i + self.feature_extractor.nb_max_frames])
             )
+            encoder_outputs[i] = encoder_output
             # results is a list of tuple[str, float] with language names and probabilities.
             results = self.model.detect_language(encoder_output)[0]
 
@@ -1796,7 +4248,330 @@ class WhisperModel:
             )
             language_probability = max(detected_language_info[language])
 
-        return language, language_probability, all_language_probs
+        return language, language_probability, all_language_probs, encoder_outputs
+
+
+async def iterate_in_executor(
+    iterator: Iterator,
+    executor: Optional[Executor] = None,
+    max_queue_size: int = 8,
+    cancel_event: Optional[threading.Event] = None,
+) -> AsyncIterator:
+    """Iterates a blocking iterator in an executor.
+
+    At most `max_queue_size` items are produced ahead of the consumer. When the consumer
+    stops, `cancel_event` is set and the iterator is closed.
+    """
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue()
+    slots = threading.Semaphore(max_queue_size)
+    stopped = threading.Event()
+    end = object()
+
+    def produce():
+        try:
+            for item in iterator:
+                slots.acquire()
+                if stopped.is_set():
+                    break
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+        except BaseException as e:
+            loop.call_soon_threadsafe(queue.put_nowait, e)
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+            loop.call_soon_threadsafe(queue.put_nowait, end)
+
+    producer = loop.run_in_executor(executor, produce)
+
+    try:
+        while True:
+            item = await queue.get()
+            if item is end:
+                break
+            if isinstance(item, BaseException):
+                raise item
+            slots.release()
+            yield item
+    finally:
+        stopped.set()
+        if cancel_event is not None:
+            cancel_event.set()
+        # Unblock the producer if it is waiting for a slot.
+        slots.release()
+        if not producer.done():
+            producer.add_done_callback(lambda future: future.exception())
+
+
+class LazyWordTimestamps:
+    """Computes the word timestamps of a window when the words of a segment are accessed.
+
+    The encoder outputs of the windows are kept until their total size exceeds the memory
+    budget: the oldest ones are then dropped, and the windows are encoded again from their
+    features when their words are accessed.
+    """
+
+    def __init__(self, model: "WhisperModel", options: TranscriptionOptions):
+        self.model = model
+        self.options = options
+        self.memory_budget = (
+            int(options.word_timestamps_memory_budget * 1024 * 1024)
+            if options.word_timestamps_memory_budget is not None
+            else None
+        )
+        self.memory_usage = 0
+        self.encoder_outputs = OrderedDict()
+        self.windows = []
+        self.lock = threading.Lock()
+
+    def add_window(
+        self,
+        features: np.ndarray,
+        segment_size: int,
+        segments: List[dict],
+        tokenizer: Tokenizer,
+        encoder_output: ctranslate2.StorageView,
+        last_speech_timestamp: float,
+    ) -> int:
+        """Registers the segments of a window and returns the window index."""
+        with self.lock:
+            window_idx = len(self.windows)
+            self.windows.append(
+                dict(
+                    features=features,
+                    segment_size=segment_size,
+                    segments=[
+                        dict(
+                            seek=segment["seek"],
+                            start=segment["start"],
+                            end=segment["end"],
+                            tokens=segment["tokens"],
+                        )
+                        for segment in segments
+                    ],
+                    # The language of the tokenizer can change in the next windows.
+                    tokenizer=copy.copy(tokenizer),
+                    last_speech_timestamp=last_speech_timestamp,
+                    words=None,
+                )
+            )
+
+            size = get_storage_size(encoder_output)
+            if self.memory_budget is None or size <= self.memory_budget:
+                self.encoder_outputs[window_idx] = encoder_output
+                self.memory_usage += size
+                while self.memory_budget is not None and (
+                    self.memory_usage > self.memory_budget
+                ):
+                    _, dropped_output = self.encoder_outputs.popitem(last=False)
+                    self.memory_usage -= get_storage_size(dropped_output)
+
+            return window_idx
+
+    def get_lazy_words(self, window_idx: int, segment_idx: int) -> LazyWords:
+        """Returns the words of a segment, computed when they are first accessed."""
+        return LazyWords(partial(self.get_words, window_idx, segment_idx))
+
+    def get_words(self, window_idx: int, segment_idx: int) -> List[Word]:
+        with self.lock:
+            window = self.windows[window_idx]
+
+            if window["words"] is None:
+                encoder_output = self.encoder_outputs.pop(window_idx, None)
+                if encoder_output is None:
+                    encoder_output = self.model.encode(pad_or_trim(window["features"]))
+                else:
+                    self.memory_usage -= get_storage_size(encoder_output)
+
+                segments = window["segments"]
+                self.model.add_word_timestamps(
+                    [segments],
+                    window["tokenizer"],
+                    encoder_output,
+                    window["segment_size"],
+                    self.options.prepend_punctuations,
+                    self.options.append_punctuations,
+                    last_speech_timestamp=window["last_speech_timestamp"],
+                )
+                window["words"] = [segment["words"] for segment in segments]
+                window["features"] = None
+                window["segments"] = None
+
+            return [Word(**word) for word in window["words"][segment_idx]]
+
+
+def apply_degradation(options: TranscriptionOptions, degradation: str) -> None:
+    """Applies a degradation of the time budget to the options."""
+    if degradation == "beam_size":
+        options.beam_size = 1
+    elif degradation == "temperature_fallback":
+        options.temperatures = options.temperatures[:1]
+    elif degradation == "word_timestamps":
+        options.word_timestamps = False
+    elif degradation == "no_speech_probe":
+        options.no_speech_probe_threshold = options.no_speech_threshold
+
+
+def get_checkpoint_key(
+    options: List[TranscriptionOptions], tokenizers: List[Tokenizer], num_frames: int
+) -> str:
+    """Returns a hash of the audio length, the options and the tasks of a transcription, to
+    check that a checkpoint is resumed by the same transcription."""
+    key = {
+        "options": [
+            {
+                name: value
+                for name, value in asdict(transcription_options).items()
+                if name not in ("checkpoint_path", "checkpoint_interval", "resume_from")
+            }
+            for transcription_options in options
+        ],
+        "tokenizers": [
+            (tokenizer.task, tokenizer.language_code) for tokenizer in tokenizers
+        ],
+        "num_frames": num_frames,
+    }
+    return hashlib.sha256(
+        json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+def write_checkpoint(
+    path: str, key: str, state: dict, infos: List[TranscriptionInfo]
+) -> None:
+    """Writes the state of a transcription with its key and the counters of its infos."""
+    state = dict(
+        state,
+        key=key,
+        infos=[
+            {name: getattr(info, name) for name in _INFO_COUNTER_FIELDS}
+            for info in infos
+        ],
+    )
+
+    # Replace the previous checkpoint atomically so that a crash never leaves a partial file.
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+        json.dump(state, checkpoint_file, default=float)
+    os.replace(tmp_path, path)
+
+
+def read_checkpoint(path: str, key: str, infos: List[TranscriptionInfo]) -> dict:
+    """Reads the state of a transcription and restores the counters of its infos."""
+    with open(path, encoding="utf-8") as checkpoint_file:
+        state = json.load(checkpoint_file)
+
+    if state["key"] != key:
+        raise ValueError(
+            "The checkpoint %s was written by a transcription with another audio or other "
+            "options" % path
+        )
+    for info, info_state in zip(infos, state["infos"]):
+        for name, value in info_state.items():
+            setattr(info, name, value)
+
+    return state
+
+
+def segment_from_dict(segment: dict) -> Segment:
+    return Segment(
+        **dict(
+            segment,
+            words=(
+                [Word(**word) for word in segment["words"]]
+                if segment["words"] is not None
+                else None
+            ),
+        )
+    )
+
+
+def get_shard_bounds(
+    speech_chunks: List[dict], num_samples: int, num_shards: int
+) -> List[Tuple[int, int]]:
+    """Splits the audio at the middle of the silences between the speech chunks which are
+    the closest to shards of equal length, and returns the start and end of the shards.
+    """
+    silences = [
+        (previous_chunk["end"] + chunk["start"]) // 2
+        for previous_chunk, chunk in zip(speech_chunks, speech_chunks[1:])
+        if chunk["start"] > previous_chunk["end"]
+    ]
+
+    splits = []
+    for shard_idx in range(1, num_shards):
+        target = shard_idx * num_samples // num_shards
+        candidates = [split for split in silences if not splits or split > splits[-1]]
+        if not candidates:
+            break
+        splits.append(min(candidates, key=lambda split: abs(split - target)))
+
+    bounds = [0] + splits + [num_samples]
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def iterate_audio(
+    audio: Union[str, BinaryIO, np.ndarray],
+    sampling_rate: int,
+    block_size: int = 480000,
+) -> Iterator[np.ndarray]:
+    """Yields consecutive blocks of the audio, decoding it incrementally if needed."""
+    if isinstance(audio, np.ndarray):
+        for start in range(0, audio.shape[0], block_size):
+            yield audio[start : start + block_size]
+    else:
+        if not isinstance(audio, str):
+            audio.seek(0)
+        yield from decode_audio_blocks(audio, sampling_rate=sampling_rate)
+
+
+def split_variant_segments(
+    segments: Iterable[Tuple[int, Segment]], num_variants: int
+) -> Tuple[Iterable[Segment], ...]:
+    """Splits the tuples of variant index and segment into one generator per variant."""
+    return tuple(
+        select_variant_segments(variant_segments, variant_idx)
+        for variant_idx, variant_segments in enumerate(
+            itertools.tee(segments, num_variants)
+        )
+    )
+
+
+def select_variant_segments(
+    segments: Iterable[Tuple[int, Segment]], variant_idx: int
+) -> Iterable[Segment]:
+    for segment_variant_idx, segment in segments:
+        if segment_variant_idx == variant_idx:
+            yield segment
+
+
+def get_decoding_key(
+    tokenizer: Tokenizer,
+    options: TranscriptionOptions,
+    info: Optional[TranscriptionInfo],
+) -> tuple:
+    """Returns a key which is equal for the chunks that can be decoded in the same batch."""
+    key = (tokenizer.task, tokenizer.language) + tuple(
+        repr(getattr(options, name)) for name in _DECODING_OPTION_FIELDS
+    )
+    if (
+        options.adaptive_beam_log_prob_threshold is not None
+        or options.adaptive_beam_compression_ratio_threshold is not None
+    ):
+        # The adaptive beam counters are reported in the info of the transcription.
+        key += (id(info),)
+    return key
+
+
+def release_turn_segments(segments: Iterable, turn: "PriorityTurn") -> Iterable:
+    """Releases the turn of the transcription before each segment is yielded and when the
+    generator stops."""
+    try:
+        for segment in segments:
+            turn.release()
+            yield segment
+    finally:
+        turn.release()
 
 
 def restore_speech_timestamps(
@@ -1807,16 +4582,17 @@ def restore_speech_timestamps(
     ts_map = SpeechTimestampsMap(speech_chunks, sampling_rate)
 
     for segment in segments:
-        if segment.words:
-            words = []
-            for word in segment.words:
-                # Ensure the word start and end times are resolved to the same chunk.
-                middle = (word.start + word.end) / 2
-                chunk_index = ts_map.get_chunk_index(middle)
-                word.start = ts_map.get_original_time(word.start, chunk_index)
-                word.end = ts_map.get_original_time(word.end, chunk_index)
-                words.append(word)
+        lazy_words = segment._words if isinstance(segment, LazySegment) else None
+        if isinstance(lazy_words, LazyWords):
+            # The lazy words are restored when they are computed.
+            segment.words = LazyWords(
+                partial(restore_word_timestamps, lazy_words.get, ts_map)
+            )
+            segment.start = ts_map.get_original_time(segment.start)
+            segment.end = ts_map.get_original_time(segment.end)
 
+        elif segment.words:
+            words = restore_word_timestamps(lambda: segment.words, ts_map)
             segment.start = words[0].start
             segment.end = words[-1].end
             segment.words = words
@@ -1828,17 +4604,59 @@ def restore_speech_timestamps(
         yield segment
 
 
+def restore_word_timestamps(
+    load_words: Callable[[], List[Word]],
+    ts_map: SpeechTimestampsMap,
+) -> List[Word]:
+    words = []
+    for word in load_words():
+        # Ensure the word start and end times are resolved to the same chunk.
+        middle = (word.start + word.end) / 2
+        chunk_index = ts_map.get_chunk_index(middle)
+        word.start = ts_map.get_original_time(word.start, chunk_index)
+        word.end = ts_map.get_original_time(word.end, chunk_index)
+        words.append(word)
+    return words
+
+
 def get_ctranslate2_storage(segment: np.ndarray) -> ctranslate2.StorageView:
     segment = np.ascontiguousarray(segment)
     segment = ctranslate2.StorageView.from_array(segment)
     return segment
 
 
+def get_storage_size(storage: ctranslate2.StorageView) -> int:
+    itemsize = (
+        2
+        if storage.dtype
+        in (ctranslate2.DataType.float16, ctranslate2.DataType.bfloat16)
+        else 4
+    )
+    return int(np.prod(storage.shape)) * itemsize
+
+
 def get_compression_ratio(text: str) -> float:
     text_bytes = text.encode("utf-8")
     return len(text_bytes) / len(zlib.compress(text_bytes))
 
 
+def has_repeated_ngram_suffix(
+    tokens: List[int], min_repeats: int = 4, min_length: int = 16
+) -> bool:
+    """Checks whether the tokens end with a n-gram repeated consecutively."""
+    for ngram_size in range(1, len(tokens) // min_repeats + 1):
+        repeats = max(min_repeats, ceil(min_length / ngram_size))
+        if ngram_size * repeats > len(tokens):
+            break
+        ngram = tokens[-ngram_size:]
+        if all(
+            tokens[-(i + 1) * ngram_size : len(tokens) - i * ngram_size] == ngram
+            for i in range(1, repeats)
+        ):
+            return True
+    return False
+
+
 def get_suppressed_tokens(
     tokenizer: Tokenizer,
     suppress_tokens: Tuple[int],
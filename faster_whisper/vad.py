@@ -1,9 +1,11 @@
 import bisect
 import functools
+import hashlib
+import itertools
 import os
 
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import numpy as np
 
@@ -32,6 +34,15 @@ class VadOptions:
       min_silence_duration_ms: In the end of each speech chunk wait for min_silence_duration_ms
         before separating it
       speech_pad_ms: Final speech chunks are padded by speech_pad_ms each side
+      chunk_packing: Strategy used by `merge_segments` to pack speech chunks into windows of
+        at most max_speech_duration_s. "greedy" fills each window in order; "optimal" also
+        uses the minimum number of windows but places the cuts on the longest silences.
+      max_merge_silence_s: Silences longer than this are never merged into a window, so the
+        windows do not span long non-speech regions.
+      quantized: Use the int8-quantized Silero encoder, which runs faster on CPU. The speech
+        timestamps can move by one VAD window (32ms) compared to the float model.
+      onnx_cache_dir: Directory where the graph-optimized ONNX models are serialized on first
+        load. Later processes load them from there and skip the graph optimizations.
     """
 
     threshold: float = 0.5
@@ -40,10 +51,14 @@ class VadOptions:
     max_speech_duration_s: float = float("inf")
     min_silence_duration_ms: int = 2000
     speech_pad_ms: int = 400
+    chunk_packing: str = "greedy"
+    max_merge_silence_s: float = float("inf")
+    quantized: bool = False
+    onnx_cache_dir: Optional[str] = None
 
 
 def get_speech_timestamps(
-    audio: np.ndarray,
+    audio: Union[np.ndarray, Iterable[np.ndarray]],
     vad_options: Optional[VadOptions] = None,
     sampling_rate: int = 16000,
     **kwargs,
@@ -51,7 +66,8 @@ def get_speech_timestamps(
     """This method is used for splitting long audios into speech chunks using silero VAD.
 
     Args:
-      audio: One dimensional float array.
+      audio: One dimensional float array, or an iterable of consecutive one dimensional
+        float arrays to process the audio incrementally.
       vad_options: Options for VAD processing.
       sampling rate: Sampling rate of the audio.
       kwargs: VAD options passed as keyword arguments for backward compatibility.
@@ -79,14 +95,26 @@ def get_speech_timestamps(
     min_silence_samples = sampling_rate * min_silence_duration_ms / 1000
     min_silence_samples_at_max_speech = sampling_rate * 98 / 1000
 
-    audio_length_samples = len(audio)
+    model = get_vad_model(vad_options.quantized, vad_options.onnx_cache_dir)
 
-    model = get_vad_model()
-
-    padded_audio = np.pad(
-        audio, (0, window_size_samples - audio.shape[0] % window_size_samples)
-    )
-    speech_probs = model(padded_audio.reshape(1, -1)).squeeze(0)
+    if isinstance(audio, np.ndarray):
+        audio_length_samples = len(audio)
+        padded_audio = np.pad(
+            audio, (0, window_size_samples - audio.shape[0] % window_size_samples)
+        )
+        speech_probs = model(padded_audio.reshape(1, -1)).squeeze(0)
+    else:
+        audio_length_samples = 0
+
+        def count_samples(audio_blocks):
+            nonlocal audio_length_samples
+            for block in audio_blocks:
+                audio_length_samples += len(block)
+                yield block
+
+        speech_probs = np.concatenate(
+            list(model.stream(count_samples(audio), window_size_samples))
+        )
 
     triggered = False
     speeches = []
@@ -206,6 +234,29 @@ def collect_chunks(
     return audio_chunks, chunks_metadata
 
 
+def iterate_chunks(
+    audio_blocks: Iterable[np.ndarray], chunks: List[dict]
+) -> Iterator[np.ndarray]:
+    """Yields the audio of the chunks from consecutive audio blocks."""
+    chunks = iter(chunks)
+    chunk = next(chunks, None)
+    block_start = 0
+
+    for block in audio_blocks:
+        block_end = block_start + len(block)
+
+        while chunk is not None and chunk["start"] < block_end:
+            start = max(chunk["start"], block_start)
+            end = min(chunk["end"], block_end)
+            if end > start:
+                yield block[start - block_start : end - block_start]
+            if chunk["end"] > block_end:
+                break
+            chunk = next(chunks, None)
+
+        block_start = block_end
+
+
 class SpeechTimestampsMap:
     """Helper class to restore original speech timestamps."""
 
@@ -245,15 +296,18 @@ class SpeechTimestampsMap:
 
 
 @functools.lru_cache
-def get_vad_model():
+def get_vad_model(quantized: bool = False, cache_dir: Optional[str] = None):
     """Returns the VAD model instance."""
-    encoder_path = os.path.join(get_assets_path(), "silero_encoder_v5.onnx")
+    encoder_path = os.path.join(
+        get_assets_path(),
+        "silero_encoder_v5_int8.onnx" if quantized else "silero_encoder_v5.onnx",
+    )
     decoder_path = os.path.join(get_assets_path(), "silero_decoder_v5.onnx")
-    return SileroVADModel(encoder_path, decoder_path)
+    return SileroVADModel(encoder_path, decoder_path, cache_dir=cache_dir)
 
 
 class SileroVADModel:
-    def __init__(self, encoder_path, decoder_path):
+    def __init__(self, encoder_path, decoder_path, cache_dir=None):
         try:
             import onnxruntime
         except ImportError as e:
@@ -261,22 +315,8 @@ class SileroVADModel:
                 "Applying the VAD filter requires the onnxruntime package"
             ) from e
 
-        opts = onnxruntime.SessionOptions()
-        opts.inter_op_num_threads = 1
-        opts.intra_op_num_threads = 1
-        opts.enable_cpu_mem_arena = False
-        opts.log_severity_level = 4
-
-        self.encoder_session = onnxruntime.InferenceSession(
-            encoder_path,
-            providers=["CPUExecutionProvider"],
-            sess_options=opts,
-        )
-        self.decoder_session = onnxruntime.InferenceSession(
-            decoder_path,
-            providers=["CPUExecutionProvider"],
-            sess_options=opts,
-        )
+        self.encoder_session = _create_session(onnxruntime, encoder_path, cache_dir)
+        self.decoder_session = _create_session(onnxruntime, decoder_path, cache_dir)
 
     def __call__(
         self, audio: np.ndarray, num_samples: int = 512, context_size_samples: int = 64
@@ -302,7 +342,56 @@ class SileroVADModel:
         context = np.roll(context, 1, 1)
         batched_audio = np.concatenate([context, batched_audio], 2)
 
-        batched_audio = batched_audio.reshape(-1, num_samples + context_size_samples)
+        out, _ = self._run(batched_audio, state)
+        return out
+
+    def stream(
+        self,
+        audio_blocks: Iterable[np.ndarray],
+        num_samples: int = 512,
+        context_size_samples: int = 64,
+    ) -> Iterator[np.ndarray]:
+        """Yields the speech probabilities of the windows completed by each audio block.
+
+        The context and the state are carried from one block to the next, and the end of
+        the audio is padded like in `get_speech_timestamps`, so that the probabilities are
+        the same as for the concatenated audio.
+        """
+        state = np.zeros((2, 1, 128), dtype="float32")
+        context = np.zeros((1, 1, context_size_samples), dtype="float32")
+        remainder = np.zeros(0, dtype="float32")
+
+        for block in itertools.chain(audio_blocks, [None]):
+            if block is None:
+                audio = np.pad(
+                    remainder, (0, num_samples - len(remainder) % num_samples)
+                )
+                # __call__ zeroes the end of the last window when it builds the contexts.
+                audio[-context_size_samples:] = 0
+            else:
+                audio = np.concatenate([remainder, block])
+                num_windows = len(audio) // num_samples
+                remainder = audio[num_windows * num_samples :]
+                audio = audio[: num_windows * num_samples]
+
+            windows = audio.reshape(1, -1, num_samples)
+            if windows.shape[1]:
+                contexts = np.concatenate(
+                    [context, windows[:, :-1, -context_size_samples:]], axis=1
+                )
+                context = windows[:, -1:, -context_size_samples:]
+                out, state = self._run(np.concatenate([contexts, windows], 2), state)
+                out = out.reshape(-1)
+            else:
+                out = np.zeros(0, dtype="float32")
+
+            yield out
+
+    def _run(
+        self, batched_audio: np.ndarray, state: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        batch_size = batched_audio.shape[0]
+        batched_audio = batched_audio.reshape(-1, batched_audio.shape[-1])
 
         encoder_batch_size = 10000
         num_segments = batched_audio.shape[0]
@@ -324,20 +413,65 @@ class SileroVADModel:
             decoder_outputs.append(out)
 
         out = np.stack(decoder_outputs, axis=1).squeeze(-1)
-        return out
+        return out, state
+
+
+def _create_session(onnxruntime, model_path, cache_dir=None):
+    opts = onnxruntime.SessionOptions()
+    opts.inter_op_num_threads = 1
+    opts.intra_op_num_threads = 1
+    opts.enable_cpu_mem_arena = False
+    opts.log_severity_level = 4
+
+    if cache_dir is not None:
+        # The cached graph is specific to the source model and the onnxruntime version.
+        with open(model_path, "rb") as model_file:
+            digest = hashlib.sha1(model_file.read()).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(model_path))[0]
+        optimized_path = os.path.join(
+            cache_dir,
+            "%s.%s.ort-%s.onnx" % (name, digest, onnxruntime.__version__),
+        )
+
+        if os.path.isfile(optimized_path):
+            opts.graph_optimization_level = (
+                onnxruntime.GraphOptimizationLevel.ORT_DISABLE_ALL
+            )
+            model_path = optimized_path
+        else:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = "%s.%d.tmp" % (optimized_path, os.getpid())
+            opts.graph_optimization_level = (
+                onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+            )
+            opts.optimized_model_filepath = tmp_path
+            try:
+                session = onnxruntime.InferenceSession(
+                    model_path,
+                    providers=["CPUExecutionProvider"],
+                    sess_options=opts,
+                )
+                # Rename at the end so that concurrent processes never load a partial file.
+                os.replace(tmp_path, optimized_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return session
+
+    return onnxruntime.InferenceSession(
+        model_path,
+        providers=["CPUExecutionProvider"],
+        sess_options=opts,
+    )
 
 
 def merge_segments(segments_list, vad_options: VadOptions, sampling_rate: int = 16000):
     if not segments_list:
         return []
 
-    curr_end = 0
-    seg_idxs = []
-    merged_segments = []
     edge_padding = vad_options.speech_pad_ms * sampling_rate // 1000
     chunk_length = vad_options.max_speech_duration_s * sampling_rate
-
-    curr_start = segments_list[0]["start"]
+    max_silence = vad_options.max_merge_silence_s * sampling_rate
 
     for idx, seg in enumerate(segments_list):
         # if any segment start timing is less than previous segment end timing,
@@ -349,24 +483,103 @@ def merge_segments(segments_list, vad_options: VadOptions, sampling_rate: int =
             if seg["end"] > segments_list[idx + 1]["start"]:
                 seg["end"] -= edge_padding
 
-        if seg["end"] - curr_start > chunk_length and curr_end - curr_start > 0:
-            merged_segments.append(
-                {
-                    "start": curr_start,
-                    "end": curr_end,
-                    "segments": seg_idxs,
-                }
-            )
-            curr_start = seg["start"]
-            seg_idxs = []
-        curr_end = seg["end"]
-        seg_idxs.append((seg["start"], seg["end"]))
-    # add final
-    merged_segments.append(
+    if vad_options.chunk_packing == "greedy":
+        groups = _pack_greedy(segments_list, chunk_length, max_silence)
+    elif vad_options.chunk_packing == "optimal":
+        groups = _pack_optimal(segments_list, chunk_length, max_silence)
+    else:
+        raise ValueError(
+            "Invalid chunk packing '%s', expected one of: greedy, optimal"
+            % vad_options.chunk_packing
+        )
+
+    return [
         {
-            "start": curr_start,
-            "end": curr_end,
-            "segments": seg_idxs,
+            "start": group[0]["start"],
+            "end": group[-1]["end"],
+            "segments": [(seg["start"], seg["end"]) for seg in group],
         }
+        for group in groups
+    ]
+
+
+def _pack_greedy(segments_list, chunk_length, max_silence):
+    groups = []
+    current = [segments_list[0]]
+
+    for seg in segments_list[1:]:
+        curr_start = current[0]["start"]
+        curr_end = current[-1]["end"]
+        if (
+            seg["end"] - curr_start > chunk_length and curr_end - curr_start > 0
+        ) or seg["start"] - curr_end > max_silence:
+            groups.append(current)
+            current = []
+        current.append(seg)
+    groups.append(current)
+
+    return groups
+
+
+def _pack_optimal(segments_list, chunk_length, max_silence):
+    # Dynamic programming over the split points: best[j] is the (number of chunks,
+    # total span) of the best packing of the first j segments. Minimizing the total
+    # span for a given number of chunks moves the cuts to the longest silences.
+    num_segments = len(segments_list)
+    best = [(0, 0)] + [None] * num_segments
+    previous = [0] * (num_segments + 1)
+
+    for j in range(num_segments):
+        end = segments_list[j]["end"]
+        i = j
+        while True:
+            span = end - segments_list[i]["start"]
+            cost = (best[i][0] + 1, best[i][1] + span)
+            if best[j + 1] is None or cost < best[j + 1]:
+                best[j + 1] = cost
+                previous[j + 1] = i
+            if i == 0:
+                break
+            silence = segments_list[i]["start"] - segments_list[i - 1]["end"]
+            if (
+                silence > max_silence
+                or end - segments_list[i - 1]["start"] > chunk_length
+            ):
+                break
+            i -= 1
+
+    groups = []
+    j = num_segments
+    while j > 0:
+        i = previous[j]
+        groups.append(segments_list[i:j])
+        j = i
+
+    return groups[::-1]
+
+
+def get_chunks_fill_ratio(
+    chunks: List[dict], chunk_length: float, sampling_rate: int = 16000
+) -> float:
+    """Returns the fraction of the encoder windows that is filled with speech.
+
+    Args:
+      chunks: Chunks as returned by `merge_segments`, or dicts with "start" and "end" samples.
+      chunk_length: Duration of an encoder window in seconds.
+      sampling_rate: Sampling rate of the audio.
+
+    Returns:
+      The speech duration divided by the total duration of the encoder windows.
+    """
+    if not chunks:
+        return 0.0
+
+    speech_samples = sum(
+        (
+            sum(end - start for start, end in chunk["segments"])
+            if "segments" in chunk
+            else chunk["end"] - chunk["start"]
+        )
+        for chunk in chunks
     )
-    return merged_segments
+    return speech_samples / (len(chunks) * chunk_length * sampling_rate)
@@ -1,9 +1,29 @@
+import asyncio
 import inspect
+import io
+import json
 import os
+import pickle
+import resource
+import struct
+import threading
+import time
+
+from dataclasses import asdict
 
 import numpy as np
+import pytest
 
-from faster_whisper import BatchedInferencePipeline, WhisperModel, decode_audio
+from faster_whisper import (
+    BatchedInferencePipeline,
+    BatchScheduler,
+    PriorityScheduler,
+    TranscriptionCallback,
+    WhisperModel,
+    WhisperPool,
+    decode_audio,
+)
+from faster_whisper.transcribe import LazySegment, LazyWords, has_repeated_ngram_suffix
 
 
 def test_supported_languages():
@@ -139,6 +159,91 @@ def test_vad(jfk_path):
     assert info.vad_options.speech_pad_ms == 200
 
 
+def test_vad_clip_timestamps(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+    audio = np.concatenate([np.zeros(5 * 16000, dtype=audio.dtype), audio])
+
+    segments, info = model.transcribe(
+        audio,
+        clip_timestamps="vad",
+        vad_parameters=dict(min_silence_duration_ms=500, speech_pad_ms=200),
+    )
+    segments = list(segments)
+
+    assert len(segments) == 1
+    segment = segments[0]
+
+    assert segment.text == (
+        " And so my fellow Americans ask not what your country can do for you, "
+        "ask what you can do for your country."
+    )
+
+    assert 5 < segment.start < 6
+    assert 15 < segment.end < 16
+
+    clip_timestamps = info.transcription_options.clip_timestamps
+    assert 5 < clip_timestamps[0] < 6
+    assert info.duration_after_vad < info.duration - 5
+
+
+def test_vad_clip_timestamps_windows(jfk_path):
+    class WindowCounter(TranscriptionCallback):
+        def __init__(self):
+            self.num_windows = 0
+
+        def on_window_start(self, seek, num_frames):
+            self.num_windows += 1
+
+    model = WhisperModel("tiny")
+    jfk = decode_audio(jfk_path)
+    silence = np.zeros(16000, dtype=jfk.dtype)
+    # 24 speech chunks of 4 seconds separated by 1 second of silence.
+    audio = np.concatenate([jfk[:64000], silence] * 24)
+
+    num_windows = {}
+    for kwargs in (dict(vad_filter=True), dict(clip_timestamps="vad")):
+        callback = WindowCounter()
+        segments, _ = model.transcribe(
+            audio,
+            callback=callback,
+            without_timestamps=True,
+            vad_parameters=dict(min_silence_duration_ms=500),
+            **kwargs,
+        )
+        list(segments)
+        num_windows[next(iter(kwargs))] = callback.num_windows
+
+    # The speech chunks are grouped in clips instead of taking one window each.
+    assert num_windows["clip_timestamps"] <= num_windows["vad_filter"] + 2
+
+
+def test_vad_clip_timestamps_long_silence(jfk_path):
+    class WindowRecorder(TranscriptionCallback):
+        def __init__(self):
+            self.windows = []
+
+        def on_window_start(self, seek, num_frames):
+            self.windows.append((seek, seek + num_frames))
+
+    model = WhisperModel("tiny")
+    jfk = decode_audio(jfk_path)
+    silence = np.zeros(10 * 16000, dtype=jfk.dtype)
+    # Two speech chunks separated by 10 seconds of silence, which fit in one window.
+    audio = np.concatenate([jfk[:64000], silence, jfk[:64000]])
+
+    callback = WindowRecorder()
+    segments, _ = model.transcribe(
+        audio, callback=callback, without_timestamps=True, clip_timestamps="vad"
+    )
+    list(segments)
+
+    # The silence is not decoded, the padding of the chunks aside.
+    assert len(callback.windows) == 2
+    for start, end in callback.windows:
+        assert end <= 500 or start >= 1300
+
+
 def test_stereo_diarization(data_dir):
     model = WhisperModel("tiny")
 
@@ -244,6 +349,17 @@ def test_transcribe_signature():
     assert model_transcribe_args == pipeline_transcribe_args
 
 
+def test_batched_unsupported_arguments(jfk_path):
+    model = WhisperModel("tiny")
+    batched_model = BatchedInferencePipeline(model=model)
+
+    for name, value in (("encode_ahead", True), ("streaming", True)):
+        with pytest.raises(ValueError, match=name):
+            batched_model.transcribe(jfk_path, **{name: value})
+        with pytest.raises(ValueError, match=name):
+            batched_model.transcribe_many([jfk_path], **{name: value})
+
+
 def test_monotonic_timestamps(physcisworks_path):
     model = WhisperModel("tiny")
     pipeline = BatchedInferencePipeline(model=model)
@@ -269,3 +385,691 @@ def test_monotonic_timestamps(physcisworks_path):
             assert word.start <= word.end
             assert word.end <= segments[i].end
     assert segments[-1].end <= info.duration
+
+
+def test_encode_ahead(data_dir):
+    model = WhisperModel("tiny", num_workers=2)
+    audio = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+
+    kwargs = dict(language="en", without_timestamps=True, window_batch_size=1)
+    segments, _ = model.transcribe(audio, **kwargs)
+    expected = [(segment.start, segment.end, segment.text) for segment in segments]
+
+    segments, _ = model.transcribe(audio, encode_ahead=True, **kwargs)
+    assert [(segment.start, segment.end, segment.text) for segment in segments] == (
+        expected
+    )
+
+    # Closing the generator early stops the encoding thread.
+    num_threads = threading.active_count()
+    segments, _ = model.transcribe(audio, encode_ahead=True, **kwargs)
+    next(segments)
+    segments.close()
+    time.sleep(0.5)
+    assert threading.active_count() <= num_threads
+
+
+def test_reuse_language_detection_encoding(data_dir):
+    model = WhisperModel("tiny")
+    audio = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+
+    segments, info = model.transcribe(audio)
+    segments = [(segment.start, segment.end, segment.text) for segment in segments]
+
+    expected, _ = model.transcribe(audio, language=info.language)
+    assert segments == [
+        (segment.start, segment.end, segment.text) for segment in expected
+    ]
+
+
+def test_window_batching(data_dir):
+    model = WhisperModel("tiny")
+    audio = decode_audio(os.path.join(data_dir, "multilingual.mp3"))
+
+    kwargs = dict(language="en", temperature=0, condition_on_previous_text=False)
+    for without_timestamps in (False, True):
+        kwargs["without_timestamps"] = without_timestamps
+        segments, _ = model.transcribe(audio, window_batch_size=1, **kwargs)
+        expected = [(seg.start, seg.end, seg.text) for seg in segments]
+
+        segments, _ = model.transcribe(audio, window_batch_size=4, **kwargs)
+        assert [(seg.start, seg.end, seg.text) for seg in segments] == expected
+
+
+def test_no_speech_probe(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+    audio = np.concatenate([audio, np.zeros(40 * 16000, dtype=audio.dtype)])
+
+    segments, info = model.transcribe(audio, no_speech_probe_threshold=0.6)
+    transcription = "".join(segment.text for segment in segments)
+
+    assert transcription == (
+        " And so my fellow Americans ask not what your country can do for you, "
+        "ask what you can do for your country."
+    )
+    assert info.no_speech_probe_skips > 0
+
+
+def test_has_repeated_ngram_suffix():
+    assert has_repeated_ngram_suffix([1, 2] + [5] * 16)
+    assert not has_repeated_ngram_suffix([1, 2] + [5] * 15)
+    assert has_repeated_ngram_suffix([9] + [1, 2, 3] * 6)
+    assert not has_repeated_ngram_suffix([9] + [1, 2, 3] * 5)
+    assert has_repeated_ngram_suffix(list(range(20)) * 4)
+    assert not has_repeated_ngram_suffix(list(range(20)) * 3)
+
+
+def test_repetition_abort_tokens(jfk_path):
+    model = WhisperModel("tiny")
+
+    for without_timestamps in (True, False):
+        kwargs = dict(
+            temperature=0.0,
+            without_timestamps=without_timestamps,
+            window_batch_size=1,
+        )
+        segments, _ = model.transcribe(jfk_path, **kwargs)
+        expected = list(segments)
+
+        # The checks every 8 tokens do not change the decoding without a repetition loop.
+        segments, _ = model.transcribe(jfk_path, repetition_abort_tokens=8, **kwargs)
+        segments = list(segments)
+
+        assert [segment.tokens for segment in segments] == [
+            segment.tokens for segment in expected
+        ]
+        for segment, expected_segment in zip(segments, expected):
+            assert abs(segment.avg_logprob - expected_segment.avg_logprob) < 1e-4
+
+
+def test_parallel_fallback(jfk_path):
+    model = WhisperModel("tiny", num_workers=2)
+
+    # All decodings fail the log probability threshold with deterministic temperatures.
+    # There are more fallback temperatures than workers to decode them.
+    kwargs = dict(temperature=[0.0] * 4, log_prob_threshold=0.0, window_batch_size=1)
+    segments, _ = model.transcribe(jfk_path, **kwargs)
+    expected = [(segment.text, segment.avg_logprob) for segment in segments]
+
+    segments, _ = model.transcribe(jfk_path, parallel_fallback=True, **kwargs)
+    assert [(segment.text, segment.avg_logprob) for segment in segments] == expected
+
+
+def test_parallel_fallback_single_worker(jfk_path, caplog):
+    model = WhisperModel("tiny")
+
+    segments, _ = model.transcribe(
+        jfk_path, temperature=[0.0] * 2, log_prob_threshold=0.0, parallel_fallback=True
+    )
+    list(segments)
+
+    assert "setting parallel_fallback to False" in caplog.text
+
+
+def test_batched_fallback(jfk_path):
+    model = WhisperModel("tiny")
+    batched_model = BatchedInferencePipeline(model=model)
+
+    segments, _ = batched_model.transcribe(jfk_path, temperature=0.0)
+    expected = [(segment.text, segment.avg_logprob) for segment in segments]
+
+    # The fallback is disabled by default.
+    segments, _ = batched_model.transcribe(jfk_path, log_prob_threshold=0.0)
+    assert [(segment.text, segment.avg_logprob) for segment in segments] == expected
+
+    # All chunks fail the log probability threshold and are decoded again.
+    segments, _ = batched_model.transcribe(
+        jfk_path, temperature=[0.0, 0.0], log_prob_threshold=0.0
+    )
+    assert [(segment.text, segment.avg_logprob) for segment in segments] == expected
+
+    segments, _ = batched_model.transcribe(jfk_path, temperature=[0.0, 0.2, 0.4])
+    for segment in segments:
+        assert segment.temperature in (0.0, 0.2, 0.4)
+
+
+def test_adaptive_beam(jfk_path):
+    model = WhisperModel("tiny")
+
+    segments, _ = model.transcribe(jfk_path, temperature=0.0)
+    expected = [segment.text for segment in segments]
+
+    # The beam search runs again for every greedy decoding.
+    segments, info = model.transcribe(
+        jfk_path, temperature=0.0, adaptive_beam_log_prob_threshold=0.0
+    )
+    assert [segment.text for segment in segments] == expected
+    assert info.adaptive_beam_greedy_decodes > 0
+    assert info.adaptive_beam_escalations == info.adaptive_beam_greedy_decodes
+
+    batched_model = BatchedInferencePipeline(model=model)
+    segments, info = batched_model.transcribe(
+        jfk_path, temperature=0.0, adaptive_beam_log_prob_threshold=-10.0
+    )
+    assert len(list(segments)) > 0
+    assert info.adaptive_beam_greedy_decodes == 1
+    assert info.adaptive_beam_escalations == 0
+
+
+def test_time_budget(data_dir):
+    model = WhisperModel("tiny")
+    audio_path = os.path.join(data_dir, "multilingual.mp3")
+
+    segments, info = model.transcribe(audio_path, time_budget=1e-3)
+    assert len(list(segments)) > 0
+    assert info.degradations[:2] == ["beam_size", "temperature_fallback"]
+    assert info.transcription_options.beam_size == 5
+
+    segments, info = model.transcribe(audio_path, time_budget=1e6)
+    assert len(list(segments)) > 0
+    assert info.degradations == []
+
+
+def test_cancel_event(data_dir):
+    model = WhisperModel("tiny")
+    audio_path = os.path.join(data_dir, "multilingual.mp3")
+
+    segments, _ = model.transcribe(audio_path)
+    num_segments = len(list(segments))
+
+    cancel_event = threading.Event()
+    segments, _ = model.transcribe(audio_path, cancel_event=cancel_event)
+    first_segment = next(segments)
+    cancel_event.set()
+    remaining_segments = list(segments)
+
+    assert first_segment.seek == 0
+    assert all(segment.seek == 0 for segment in remaining_segments)
+    assert len(remaining_segments) + 1 < num_segments
+
+    batched_model = BatchedInferencePipeline(model=model)
+    cancel_event.clear()
+    segments, _ = batched_model.transcribe(
+        audio_path, batch_size=1, cancel_event=cancel_event
+    )
+    cancel_event.set()
+    assert list(segments) == []
+
+
+def test_batched_multiple_tasks(data_dir):
+    model = WhisperModel("tiny")
+    batched_model = BatchedInferencePipeline(model=model)
+    audio_path = os.path.join(data_dir, "multilingual.mp3")
+
+    expected = {}
+    for task in ("transcribe", "translate"):
+        segments, _ = batched_model.transcribe(
+            audio_path, task=task, language="fr", temperature=0
+        )
+        expected[task] = [(segment.start, segment.text) for segment in segments]
+
+    (transcription, translation), info = batched_model.transcribe(
+        audio_path, task=("transcribe", "translate"), language="fr", temperature=0
+    )
+
+    assert info.language == "fr"
+    assert [(segment.start, segment.text) for segment in translation] == expected[
+        "translate"
+    ]
+    assert [(segment.start, segment.text) for segment in transcription] == expected[
+        "transcribe"
+    ]
+
+
+def test_batched_variants(jfk_path):
+    model = WhisperModel("tiny")
+    batched_model = BatchedInferencePipeline(model=model)
+    variants = [
+        {"beam_size": 1},
+        {"beam_size": 5, "initial_prompt": "President Kennedy."},
+    ]
+
+    results = batched_model.transcribe_variants(jfk_path, variants, temperature=0)
+
+    assert len(results) == len(variants)
+    for variant, (segments, info) in zip(variants, results):
+        expected, _ = batched_model.transcribe(jfk_path, temperature=0, **variant)
+        assert info.transcription_options.beam_size == variant["beam_size"]
+        assert [(segment.start, segment.text) for segment in segments] == [
+            (segment.start, segment.text) for segment in expected
+        ]
+
+
+def test_batch_scheduler(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+    segments, _ = BatchedInferencePipeline(model).transcribe(audio, temperature=0)
+    expected = [segment.text for segment in segments]
+
+    with BatchScheduler(model, batch_size=4, max_wait=1) as scheduler:
+        results = [None] * 4
+
+        def transcribe(i):
+            pipeline = BatchedInferencePipeline(model, scheduler=scheduler)
+            segments, _ = pipeline.transcribe(audio, temperature=0)
+            results[i] = [segment.text for segment in segments]
+
+        threads = [threading.Thread(target=transcribe, args=(i,)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert scheduler.average_batch_size > 1
+
+    assert results == [expected] * 4
+
+
+def test_batch_scheduler_many(jfk_path):
+    model = WhisperModel("tiny")
+    audio = decode_audio(jfk_path)
+    segments, _ = BatchedInferencePipeline(model).transcribe_many(
+        [audio] * 4, word_timestamps=True
+    )
+    expected = [(input_idx, segment.words) for input_idx, segment in segments]
+
+    # The chunks of the inputs are submitted separately and batched by the scheduler.
+    with BatchScheduler(model, batch_size=4, max_wait=1) as scheduler:
+        pipeline = BatchedInferencePipeline(model, scheduler=scheduler)
+        segments, _ = pipeline.transcribe_many([audio] * 4, word_timestamps=True)
+        assert [(input_idx, segment.words) for input_idx, segment in segments] == (
+            expected
+        )
+        assert scheduler.average_batch_size > 1
+
+
+def test_priority_scheduler(jfk_path):
+    scheduler = PriorityScheduler(priorities=("interactive", "bulk"))
+    bulk_turn = scheduler._create_turn("bulk")
+    bulk_turn.acquire()
+    order = []
+
+    def wait_turn(priority):
+        turn = scheduler._create_turn(priority)
+        turn.acquire()
+        order.append(priority)
+        turn.release()
+
+    for num_waiting, priority in enumerate(("bulk", "interactive"), 1):
+        threading.Thread(target=wait_turn, args=(priority,)).start()
+        while len(scheduler._waiting) < num_waiting:
+            time.sleep(0.01)
+
+    # The interactive transcription gets the next turn.
+    bulk_turn.release()
+    while len(order) < 2:
+        time.sleep(0.01)
+    assert order == ["interactive", "bulk"]
+
+    model = WhisperModel("tiny")
+    segments, _ = model.transcribe(
+        jfk_path, priority_scheduler=scheduler, priority="interactive"
+    )
+    assert "what you can do for your country" in "".join(s.text for s in segments)
+
+    stats = scheduler.get_wait_stats()
+    assert stats["interactive"].num_waits > 2
+    assert stats["bulk"].num_waits == 2
+    assert stats["bulk"].max_wait > 0
+
+
+def test_transcribe_many(jfk_path, data_dir):
+    model = WhisperModel("tiny")
+    batched_model = BatchedInferencePipeline(model=model)
+    inputs = [
+        jfk_path,
+        np.zeros(5 * 16000, dtype=np.float32),
+        os.path.join(data_dir, "hotwords.mp3"),
+        decode_audio(jfk_path),
+    ]
+
+    expected = []
+    for input_idx, audio in enumerate(inputs):
+        segments, _ = batched_model.transcribe(audio, temperature=0)
+        expected.extend((input_idx, segment.text) for segment in segments)
+
+    segments, infos = batched_model.transcribe_many(inputs, batch_size=4, temperature=0)
+    assert [(input_idx, segment.text) for input_idx, segment in segments] == expected
+    assert len(infos) == len(inputs)
+    assert infos[1].duration_after_vad == 0
+
+
+def test_checkpoint_resume(tmpdir, data_dir):
+    model = WhisperModel("tiny")
+    audio_path = os.path.join(data_dir, "multilingual.mp3")
+    checkpoint_path = str(tmpdir.join("checkpoint.json"))
+
+    segments, _ = model.transcribe(audio_path, temperature=0)
+    expected = [(segment.start, segment.end, segment.text) for segment in segments]
+
+    # Stop in the second window, as if the worker died.
+    segments, _ = model.transcribe(
+        audio_path,
+        temperature=0,
+        checkpoint_path=checkpoint_path,
+        checkpoint_interval=0,
+    )
+    for segment in segments:
+        if segment.seek > 0:
+            break
+    segments.close()
+
+    with open(checkpoint_path) as checkpoint_file:
+        assert json.load(checkpoint_file)["seek"] > 0
+
+    segments, _ = model.transcribe(
+        audio_path, temperature=0, resume_from=checkpoint_path
+    )
+    assert [
+        (segment.start, segment.end, segment.text) for segment in segments
+    ] == expected
+
+
+def test_transcribe_sharded(jfk_path):
+    model = WhisperModel("tiny", num_workers=2)
+    jfk = decode_audio(jfk_path)
+    silence = np.zeros(2 * 16000, dtype=np.float32)
+    audio = np.concatenate([jfk, silence, jfk])
+
+    segments, info = model.transcribe_sharded(audio, num_shards=2)
+    segments = list(segments)
+
+    assert info.language == "en"
+    assert info.duration == audio.shape[0] / 16000
+    assert [segment.id for segment in segments] == list(range(1, len(segments) + 1))
+    first_shard = [segment for segment in segments if segment.start < 12]
+    second_shard = [segment for segment in segments if segment.start >= 12]
+    assert second_shard[0].start >= 13
+    for shard_segments in (first_shard, second_shard):
+        text = "".join(segment.text for segment in shard_segments)
+        assert "what you can do for your country" in text
+
+
+def test_lazy_word_timestamps(jfk_path):
+    model = WhisperModel("tiny")
+
+    segments, _ = model.transcribe(
+        jfk_path, word_timestamps=True, lazy_word_timestamps=True
+    )
+    segments = list(segments)
+    assert isinstance(segments[0], LazySegment)
+    assert isinstance(segments[0]._words, LazyWords)
+
+    # Without memory budget, the windows are encoded again when the words are accessed.
+    reencoded_segments, _ = model.transcribe(
+        jfk_path,
+        word_timestamps=True,
+        lazy_word_timestamps=True,
+        word_timestamps_memory_budget=0,
+    )
+    reencoded_segments = list(reencoded_segments)
+
+    # The words are computed when the segments are pickled or converted to dicts.
+    pickled_segments = pickle.loads(pickle.dumps(reencoded_segments))
+    assert [asdict(segment) for segment in pickled_segments] == [
+        asdict(segment) for segment in segments
+    ]
+
+    assert [segment.words for segment in segments] == [
+        segment.words for segment in reencoded_segments
+    ]
+    assert segments[0].words[0].word == " And"
+    assert isinstance(segments[0]._words, list)
+
+
+def test_lazy_word_timestamps_eager(jfk_path):
+    model = WhisperModel("tiny")
+
+    results = []
+    for lazy_word_timestamps in (False, True):
+        segments, _ = model.transcribe(
+            jfk_path,
+            word_timestamps=True,
+            lazy_word_timestamps=lazy_word_timestamps,
+            temperature=0.0,
+        )
+        results.append([segment for segment in segments if segment.seek == 0])
+
+    # The first window is decoded and aligned in the same way. The next windows can start
+    # at a different position since the eager word alignment moves the seek.
+    eager_segments, lazy_segments = results
+    assert [(segment.tokens, segment.words) for segment in lazy_segments] == [
+        (segment.tokens, segment.words) for segment in eager_segments
+    ]
+
+
+class RecordingCallback(TranscriptionCallback):
+    def __init__(self):
+        self.events = []
+
+    def on_window_start(self, seek, num_frames):
+        self.events.append(("window_start", seek, num_frames))
+
+    def on_encoded(self, num_windows, elapsed):
+        self.events.append(("encoded", num_windows))
+
+    def on_decoded(self, num_windows, num_tokens, elapsed):
+        self.events.append(("decoded", num_windows))
+
+    def on_segment(self, segment):
+        self.events.append(("segment", segment.id))
+
+    def on_batch_done(self, num_windows, num_segments, elapsed):
+        self.events.append(("batch_done", num_windows, num_segments))
+
+
+def test_callback(data_dir):
+    model = WhisperModel("tiny")
+    audio_path = os.path.join(data_dir, "multilingual.mp3")
+
+    callback = RecordingCallback()
+    segments, _ = model.transcribe(audio_path, callback=callback)
+    segments = list(segments)
+
+    events = callback.events
+    assert [event[1] for event in events if event[0] == "segment"] == [
+        segment.id for segment in segments
+    ]
+    assert events[0] == ("window_start", 0, 3000)
+    assert events[1:3] == [("encoded", 1), ("decoded", 1)]
+    num_windows = sum(event[0] == "window_start" for event in events)
+    assert num_windows == sum(event[0] == "batch_done" for event in events)
+    assert len(segments) == sum(
+        event[2] for event in events if event[0] == "batch_done"
+    )
+
+    batched_model = BatchedInferencePipeline(model=model)
+    callback = RecordingCallback()
+    segments, _ = batched_model.transcribe(audio_path, batch_size=2, callback=callback)
+    segments = list(segments)
+
+    events = callback.events
+    assert events[:4] == [
+        ("window_start", 0, events[0][2]),
+        ("window_start", events[1][1], events[1][2]),
+        ("encoded", 2),
+        ("decoded", 2),
+    ]
+    assert events[-1][0] == "batch_done"
+    assert len(segments) == sum(
+        event[2] for event in events if event[0] == "batch_done"
+    )
+
+
+def test_transcribe_async(jfk_path):
+    model = WhisperModel("tiny")
+
+    segments, _ = model.transcribe(jfk_path)
+    expected = [segment.text for segment in segments]
+
+    async def transcribe():
+        segments, info = await model.transcribe_async(jfk_path, max_queue_size=1)
+        language = await model.detect_language_async(decode_audio(jfk_path))
+        return [segment.text async for segment in segments], info, language
+
+    texts, info, language = asyncio.run(transcribe())
+    assert texts == expected
+    assert info.language == language[0] == "en"
+
+
+def test_whisper_pool(jfk_path):
+    model = WhisperModel("tiny")
+    segments, _ = model.transcribe(jfk_path)
+    expected = [segment.text for segment in segments]
+
+    with WhisperPool("tiny", num_replicas=1) as pool:
+        futures = [pool.submit(jfk_path) for _ in range(3)]
+        results = [future.result() for future in futures]
+        stats = pool.get_stats()
+
+    for segments, info in results:
+        assert [segment.text for segment in segments] == expected
+        assert info.language == "en"
+    assert stats.queue_depth == 0
+    assert stats.completed_requests == 3
+    assert 0 < stats.utilization <= 1
+
+
+def test_whisper_pool_load_failure():
+    errors = []
+
+    def create_pool():
+        try:
+            WhisperPool("/nonexistent", cpu_sets=[{0}, {1}], max_queue_size=1)
+        except Exception as e:
+            errors.append(e)
+
+    # The pool is closed without waiting for the replicas which failed to load.
+    thread = threading.Thread(target=create_pool, daemon=True)
+    thread.start()
+    thread.join(timeout=60)
+
+    assert not thread.is_alive()
+    assert len(errors) == 1
+
+
+class LoopedWave(io.RawIOBase):
+    """WAV file repeating a waveform, generated when it is read."""
+
+    def __init__(self, duration, waveform=None, sampling_rate=16000):
+        if waveform is None:
+            waveform = np.zeros(1, dtype=np.float32)
+        self.data = (waveform * 32767).astype("<i2").tobytes()
+        data_size = int(duration * sampling_rate) * 2
+        self.header = struct.pack(
+            "<4sI4s4sIHHIIHH4sI",
+            b"RIFF",
+            36 + data_size,
+            b"WAVE",
+            b"fmt ",
+            16,
+            1,
+            1,
+            sampling_rate,
+            sampling_rate * 2,
+            2,
+            16,
+            b"data",
+            data_size,
+        )
+        self.size = len(self.header) + data_size
+        self.position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        self.position = offset
+        return self.position
+
+    def tell(self):
+        return self.position
+
+    def readinto(self, buffer):
+        size = max(min(len(buffer), self.size - self.position), 0)
+        header = self.header[self.position : self.position + size]
+        buffer[: len(header)] = header
+        start = max(self.position - len(self.header), 0) % len(self.data)
+        end = start + size - len(header)
+        buffer[len(header) : size] = (self.data * -(-end // len(self.data)))[start:end]
+        self.position += size
+        return size
+
+
+def test_streaming_memory():
+    model = WhisperModel("tiny")
+    duration = 10 * 3600
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    segments, info = model.transcribe(
+        LoopedWave(duration),
+        language="en",
+        streaming=True,
+        clip_timestamps=[0, 30, duration - 30, duration],
+    )
+    segments = list(segments)
+
+    assert info.duration == duration
+    # The decoded audio alone would take 2.3 GB. ru_maxrss is in kilobytes on Linux.
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak_rss < 500 * 1024
+
+
+def test_streaming_vad_memory(jfk_path):
+    model = WhisperModel("tiny")
+    duration = 3600
+    # One utterance per minute.
+    waveform = np.concatenate([decode_audio(jfk_path), np.zeros(49 * 16000)])
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    segments, info = model.transcribe(
+        LoopedWave(duration, waveform),
+        language="en",
+        vad_filter=True,
+        streaming=True,
+        without_timestamps=True,
+    )
+    segments = list(segments)
+
+    assert info.duration == duration
+    assert 60 * 10 < info.duration_after_vad < 60 * 12
+    assert segments
+    # The decoded audio alone would take 230 MB and its features 115 MB.
+    assert resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - peak_rss < 200 * 1024
+
+
+def test_streaming_equivalence(jfk_path):
+    model = WhisperModel("tiny")
+    waveform = np.concatenate([decode_audio(jfk_path), np.zeros(19 * 16000)])
+
+    results = []
+    for streaming in (False, True):
+        segments, info = model.transcribe(
+            LoopedWave(180, waveform),
+            language="en",
+            vad_filter=True,
+            temperature=0.0,
+            condition_on_previous_text=False,
+            streaming=streaming,
+        )
+        segments = list(segments)
+        results.append((info, segments))
+
+    (info, segments), (streaming_info, streaming_segments) = results
+    assert streaming_info.duration == info.duration
+    assert streaming_info.duration_after_vad == info.duration_after_vad
+    # The features of each window are normalized on their own when streaming, which
+    # changes them slightly.
+    assert [segment.text for segment in streaming_segments] == [
+        segment.text for segment in segments
+    ]
+    for streaming_segment, segment in zip(streaming_segments, segments):
+        assert abs(streaming_segment.start - segment.start) <= 0.5
+        assert abs(streaming_segment.end - segment.end) <= 0.5
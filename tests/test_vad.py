@@ -0,0 +1,101 @@
+import os
+
+import pytest
+
+from faster_whisper import decode_audio
+from faster_whisper.vad import (
+    VadOptions,
+    _create_session,
+    get_chunks_fill_ratio,
+    get_speech_timestamps,
+    get_vad_model,
+    merge_segments,
+)
+
+
+def _segments(*bounds):
+    return [
+        {"start": int(start * 16000), "end": int(end * 16000)} for start, end in bounds
+    ]
+
+
+def test_merge_segments_optimal_packing():
+    bounds = [(0, 4), (5, 12), (20, 26), (26.5, 33)]
+
+    greedy = merge_segments(
+        _segments(*bounds), VadOptions(max_speech_duration_s=30, speech_pad_ms=0)
+    )
+    optimal = merge_segments(
+        _segments(*bounds),
+        VadOptions(max_speech_duration_s=30, speech_pad_ms=0, chunk_packing="optimal"),
+    )
+
+    assert len(optimal) == len(greedy) == 2
+    # The optimal packing cuts at the 8 seconds silence instead of the 0.5 second one.
+    assert [chunk["end"] / 16000 for chunk in greedy] == [26, 33]
+    assert [chunk["end"] / 16000 for chunk in optimal] == [12, 33]
+    assert sum(len(chunk["segments"]) for chunk in optimal) == len(bounds)
+
+
+def test_merge_segments_max_silence():
+    chunks = merge_segments(
+        _segments((0, 2), (3, 5), (10, 12)),
+        VadOptions(max_speech_duration_s=30, speech_pad_ms=0, max_merge_silence_s=2),
+    )
+
+    assert [(chunk["start"] / 16000, chunk["end"] / 16000) for chunk in chunks] == [
+        (0, 5),
+        (10, 12),
+    ]
+
+    fill_ratio = get_chunks_fill_ratio(chunks, 30)
+    assert abs(fill_ratio - 6 / 60) < 1e-6
+
+
+def test_quantized_vad_model(jfk_path):
+    audio = decode_audio(jfk_path)
+
+    speech_chunks = get_speech_timestamps(audio, VadOptions())
+    quantized_speech_chunks = get_speech_timestamps(audio, VadOptions(quantized=True))
+
+    # The timestamps move by at most one VAD window of 512 samples.
+    assert len(quantized_speech_chunks) == len(speech_chunks)
+    for chunk, quantized_chunk in zip(speech_chunks, quantized_speech_chunks):
+        assert abs(chunk["start"] - quantized_chunk["start"]) <= 512
+        assert abs(chunk["end"] - quantized_chunk["end"]) <= 512
+
+
+def test_vad_model_cache_dir(tmpdir, jfk_path):
+    cache_dir = str(tmpdir.join("vad"))
+    audio = decode_audio(jfk_path)
+
+    speech_chunks = get_speech_timestamps(audio, VadOptions(onnx_cache_dir=cache_dir))
+    assert len(os.listdir(cache_dir)) == 2
+
+    # Load the serialized graphs in a new model instance.
+    get_vad_model.cache_clear()
+    cached_speech_chunks = get_speech_timestamps(
+        audio, VadOptions(onnx_cache_dir=cache_dir)
+    )
+    assert cached_speech_chunks == speech_chunks
+
+
+def test_vad_model_cache_dir_failure(tmpdir, jfk_path):
+    import onnxruntime
+
+    class FailingOnnxRuntime:
+        SessionOptions = onnxruntime.SessionOptions
+        GraphOptimizationLevel = onnxruntime.GraphOptimizationLevel
+        __version__ = onnxruntime.__version__
+
+        @staticmethod
+        def InferenceSession(model_path, providers, sess_options):
+            # Fail after the optimized graph is written.
+            with open(sess_options.optimized_model_filepath, "wb"):
+                pass
+            raise RuntimeError("Session creation failed")
+
+    cache_dir = str(tmpdir.join("vad"))
+    with pytest.raises(RuntimeError):
+        _create_session(FailingOnnxRuntime, jfk_path, cache_dir)
+    assert os.listdir(cache_dir) == []
@@ -0,0 +1,107 @@
+"""Regenerates the int8-quantized Silero VAD encoder shipped in faster_whisper/assets.
+
+The encoder is statically quantized with onnxruntime, using speech from the test data as
+calibration set. The STFT convolution and the first convolution layer are kept in float:
+their inputs have a large dynamic range and quantizing them degrades the speech
+probabilities.
+
+Usage:
+  pip install onnx
+  python tools/quantize_silero_vad.py
+"""
+
+import argparse
+import os
+
+import numpy as np
+
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    QuantFormat,
+    QuantType,
+    quantize_static,
+)
+
+from faster_whisper.audio import decode_audio
+from faster_whisper.utils import get_assets_path
+
+base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_EXCLUDED_NODES = ["/feature_extractor/Conv", "/conv0/Conv"]
+
+
+class AudioCalibrationReader(CalibrationDataReader):
+    def __init__(
+        self,
+        audio_paths,
+        num_samples=512,
+        context_size_samples=64,
+        batch_size=2000,
+    ):
+        audio = np.concatenate([decode_audio(path) for path in audio_paths])
+        frames = audio[: len(audio) // num_samples * num_samples]
+        frames = frames.reshape(-1, num_samples)
+
+        # Prepend the context of each frame as done in SileroVADModel.__call__.
+        context = np.concatenate(
+            [
+                np.zeros((1, context_size_samples), dtype=np.float32),
+                frames[:-1, -context_size_samples:],
+            ]
+        )
+        inputs = np.concatenate([context, frames], axis=1)
+
+        self.batches = iter(
+            [
+                {"input": inputs[i : i + batch_size]}
+                for i in range(0, len(inputs), batch_size)
+            ]
+        )
+
+    def get_next(self):
+        return next(self.batches, None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument(
+        "--input",
+        default=os.path.join(get_assets_path(), "silero_encoder_v5.onnx"),
+        help="Path to the float Silero VAD encoder.",
+    )
+    parser.add_argument(
+        "--output",
+        default=os.path.join(get_assets_path(), "silero_encoder_v5_int8.onnx"),
+        help="Path to the quantized encoder.",
+    )
+    parser.add_argument(
+        "--calibration_audio",
+        nargs="+",
+        default=[
+            os.path.join(base_dir, "tests", "data", filename)
+            for filename in (
+                "jfk.flac",
+                "hotwords.mp3",
+                "multilingual.mp3",
+                "stereo_diarization.wav",
+            )
+        ],
+        help="Audio files used to calibrate the activation ranges.",
+    )
+    args = parser.parse_args()
+
+    quantize_static(
+        args.input,
+        args.output,
+        AudioCalibrationReader(args.calibration_audio),
+        quant_format=QuantFormat.QOperator,
+        op_types_to_quantize=["Conv"],
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+        nodes_to_exclude=_EXCLUDED_NODES,
+    )
+
+
+if __name__ == "__main__":
+    main()